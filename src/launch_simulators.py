@@ -0,0 +1,30 @@
+"""
+Start several PLC simulators at once, on consecutive ports from PLC_SIM_PORT (default 7000).
+Used to run the tests in parallel with pytest-xdist, every worker talks to its own simulator:
+
+    python -m src.launch_simulators 4
+    pytest -n 4 --dist loadfile tests
+"""
+import os
+import subprocess
+import sys
+
+
+def main(count: int):
+    base_port = int(os.environ.get("PLC_SIM_PORT", 7000))
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "src.plc_simulator"],
+                         env={**os.environ, "PLC_SIM_PORT": str(base_port + worker)})
+        for worker in range(count)
+    ]
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        # The simulators got the interrupt too, just wait for them to stop
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count())
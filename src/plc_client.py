@@ -1,36 +1,223 @@
-from asyncua import Client
+from asyncua import Client, ua
+from asyncua.common.ua_utils import value_to_datavalue
+from dataclasses import replace
 import asyncio
 
+from src.plc_io_definitions import DigitalInputs, AnalogInputs, DigitalOutputs, BUTTONS
+from src.plc_utils import Alarms
+
+# Time a pulsed input is held high [s], longer than two PLC cycles
+PULSE_TIME = 0.5
+
+
+class ValueCache:
+    """
+    OPC UA subscription handler keeping the latest notified value of every node, keyed by name.
+    """
+    def __init__(self, names_by_nodeid):
+        self.names_by_nodeid = names_by_nodeid
+        self.values = {}
+        self.changed = asyncio.Event()
+
+    def datachange_notification(self, node, val, data):
+        self.values[self.names_by_nodeid[node.nodeid]] = val
+        self.changed.set()
+
+    async def wait_for(self, expected, timeout):
+        """
+        Wait until the cached values reach the expected ones ({name: value}), at most timeout [s].
+        Returns False on timeout.
+        """
+        try:
+            async with asyncio.timeout(timeout):
+                while any(self.values.get(name) != value for name, value in expected.items()):
+                    self.changed.clear()
+                    await self.changed.wait()
+        except TimeoutError:
+            return False
+        return True
+
 
 class PLCClient:
 
     def __init__(self, url, timeout):
         #: OPC UA client
         self.client = Client(url, timeout)
+        # The caches below are filled by subscriptions, a value is up to one publishing interval old
+        # and the caches are not synchronised with each other. They are only meant for the waits
+        # (wait_for_object_values, wait_for_alarm_statuses), the get_* methods always read the server.
+        #: Latest values of the objects watched with watch_object_values, None when nothing is watched
+        self.latest_values = None
+        #: Latest alarm statuses watched with watch_alarm_statuses, None when they are not watched
+        self.alarm_statuses = None
 
 
     async def set_object_value(self, name, value):
-        myvar = await self.myobj.get_child(f"{self.idx}:{name}")
-        await myvar.write_value(value)
+        await self.write([name], [value])
 
     async def get_object_value(self, name):
-        myvar = await self.myobj.get_child(f"{self.idx}:{name}")
-        value = await myvar.read_value()
+        value, = await self.read([self.read_ids[name]])
         return value
 
     async def get_alarm_status(self, name):
-        myalarm = await self.myobj.get_child(f"{self.idx}:{name}")
-        myvar = await myalarm.get_child(f"{self.idx}:Status")
-        value = await myvar.read_value()
+        value, = await self.read([self.alarm_status_read_ids[name]])
         return value
+
+    async def get_children(self, paths):
+        """
+        Resolve several children of the PLC object with a single TranslateBrowsePathsToNodeIds request.
+        Every path is a list of browse names, e.g. ["2:A0", "2:Status"].
+        """
+        browse_paths = []
+        for path in paths:
+            browse_path = ua.BrowsePath()
+            browse_path.StartingNode = self.myobj.nodeid
+            browse_path.RelativePath = self.make_relative_path(path)
+            browse_paths.append(browse_path)
+        results = await self.myobj.session.translate_browsepaths_to_nodeids(browse_paths)
+        nodes = []
+        for result in results:
+            result.StatusCode.check()
+            nodes.append(self.client.get_node(result.Targets[0].TargetId))
+        return nodes
+
+    async def read(self, read_ids):
+        """
+        Read the values of several nodes (ReadValueIds built in init) in a single ReadRequest.
+        If the server refuses the batch (e.g. more nodes than its MaxNodesPerRead),
+        the reads are sent concurrently instead. A node read with a bad status raises.
+        """
+        params = ua.ReadParameters()
+        params.NodesToRead = list(read_ids)
+        try:
+            results = await self.client.uaclient.read(params)
+        except ua.UaStatusCodeError:
+            if len(params.NodesToRead) == 1:
+                raise
+            values = await asyncio.gather(*(self.read([read_id]) for read_id in params.NodesToRead))
+            return [value for value, in values]
+        for result in results:
+            result.StatusCode.check()
+        return [result.Value.Value for result in results]
+
+    async def write(self, names, values):
+        """
+        Write the values of several objects in a single WriteRequest,
+        only the value is filled in the WriteValues built in init.
+        """
+        params = ua.WriteParameters()
+        params.NodesToWrite = [replace(self.write_templates[name], Value=value_to_datavalue(value))
+                               for name, value in zip(names, values)]
+        for result in await self.client.uaclient.write(params):
+            result.check()
+
+    async def get_object_values(self, names):
+        """
+        Read the values of several objects, all of them in a single ReadRequest.
+        """
+        return await self.read([self.read_ids[name] for name in names])
+
+    async def get_alarm_statuses(self, names):
+        """
+        Read the Status of several alarms, all of them in a single ReadRequest.
+        """
+        return await self.read([self.alarm_status_read_ids[name] for name in names])
     
     async def set_object_pulse(self, name):
-        myvar = await self.myobj.get_child(f"{self.idx}:{name}")
-        await myvar.write_value(True)
-        await asyncio.sleep(0.5)
-        await myvar.write_value(False)
+        await self.set_object_pulses([name])
+
+    async def set_object_values(self, names, values):
+        """
+        Write the values of several objects, all of them in a single WriteRequest.
+        """
+        await self.write(names, values)
+
+    async def set_object_pulses(self, names):
+        """
+        Pulse several objects at once and return once they are cleared again.
+        Buttons are pulsed by the server's PulseInputs method in a single call, the server clears
+        them PULSE_TIME after raising them. Its timer and the wait here are not synchronised, so
+        when the buttons are watched (watch_object_values) the falling edge is waited for on
+        latest_values, at most another PULSE_TIME, and TimeoutError is raised if it is missing.
+        Otherwise (other objects, or a server without the method) a single WriteRequest sets them
+        and another one clears them.
+        """
+        if self.pulse_method is not None and self.button_names.issuperset(names):
+            await self.myobj.call_method(self.pulse_method,
+                                         ua.Variant(list(names), ua.VariantType.String),
+                                         ua.Variant(int(PULSE_TIME * 1000), ua.VariantType.UInt32))
+            await asyncio.sleep(PULSE_TIME)
+            cleared = {name: False for name in names}
+            if self.latest_values is not None and self.latest_values.keys() >= cleared.keys():
+                if not await self.wait_for_object_values(cleared, PULSE_TIME):
+                    raise TimeoutError(f"{', '.join(names)} not cleared {PULSE_TIME}s after the pulse")
+            return
+        await self.write(names, [True] * len(names))
+        await asyncio.sleep(PULSE_TIME)
+        await self.write(names, [False] * len(names))
         
+    async def restore_state(self, snapshot):
+        """
+        Write back the inputs of a {name: value} state with a single WriteRequest.
+        Outputs are skipped, they are driven by the PLC.
+        """
+        names = [name for name in snapshot if name in self.input_names]
+        await self.set_object_values(names, [snapshot[name] for name in names])
+
+    async def subscribe_data_changes(self, names, handler, period=50):
+        """
+        Subscribe the handler (its datachange_notification method) to the value changes of several
+        objects, in a single subscription. The current values are notified right away.
+        Delete the returned subscription when done.
+
+        Args:
+            period: Publishing interval of the subscription [ms].
+        """
+        subscription = await self.client.create_subscription(period, handler)
+        await subscription.subscribe_data_change([self.nodes[name] for name in names])
+        return subscription
+
+    async def watch_object_values(self, names, period=50):
+        """
+        Keep latest_values ({name: value}) up to date for several objects, through a single
+        subscription kept until disconnect. wait_for_object_values waits on it, without reads.
+
+        Args:
+            period: Publishing interval of the subscription [ms].
+        """
+        self._value_cache = ValueCache({self.nodes[name].nodeid: name for name in names})
+        self.latest_values = self._value_cache.values
+        await self.subscribe_data_changes(names, self._value_cache, period)
+
+    async def watch_alarm_statuses(self, period=50):
+        """
+        Keep alarm_statuses ({name: status}) up to date for all alarms, through a single
+        subscription kept until disconnect. wait_for_alarm_statuses waits on it, without reads.
+
+        Args:
+            period: Publishing interval of the subscription [ms].
+        """
+        self._alarm_cache = ValueCache({node.nodeid: name for name, node in self.alarm_status_nodes.items()})
+        subscription = await self.client.create_subscription(period, self._alarm_cache)
+        await subscription.subscribe_data_change(list(self.alarm_status_nodes.values()))
+        self.alarm_statuses = self._alarm_cache.values
+
+    async def wait_for_object_values(self, expected, timeout):
+        """
+        Wait until the watched objects reach the expected values ({name: value}), at most timeout [s].
+        Returns False on timeout.
+        """
+        return await self._value_cache.wait_for(expected, timeout)
+
+    async def wait_for_alarm_statuses(self, expected, timeout):
+        """
+        Wait until the watched alarms reach the expected Status ({name: status}), at most timeout [s].
+        Returns False on timeout.
+        """
+        return await self._alarm_cache.wait_for(expected, timeout)
+
     async def disconnect(self):
+        await self.client.unregister_nodes([*self.nodes.values(), *self.alarm_status_nodes.values()])
         await self.client.disconnect()
 
     async def init(self):
@@ -38,6 +225,58 @@ class PLCClient:
         namespace = "http://examples.freeopcua.github.io"
         self.idx = await self.client.get_namespace_index(namespace)
         print("nsidx", self.idx)
+        # Browse names ("<idx>:<name>") of all PLC nodes, formatted once instead of on every call
+        names = [signal.value for signal in (*DigitalInputs, *AnalogInputs, *DigitalOutputs, *Alarms)]
+        self.child_keys = {name: f"{self.idx}:{name}" for name in [*names, "Status"]}
         self.myobj = await self.client.nodes.root.get_child(
             ["0:Objects", f"{self.idx}:myPLC"]
         )
+        # All PLC nodes are resolved with a single request and registered on the server once,
+        # every call above reuses them instead of browsing for the node again
+        signals = [signal.value for signal in (*DigitalInputs, *AnalogInputs, *DigitalOutputs)]
+        alarms = [alarm.value for alarm in Alarms]
+        nodes = await self.get_children([[self.child_keys[name]] for name in signals]
+                                        + [[self.child_keys[name], self.child_keys["Status"]] for name in alarms])
+        nodes = await self.client.register_nodes(nodes)
+        self.nodes = dict(zip(signals, nodes))
+        self.input_names = {signal.value for signal in (*DigitalInputs, *AnalogInputs)}
+        self.alarm_status_nodes = dict(zip(alarms, nodes[len(signals):]))
+
+        # Read and write requests are built from these, instead of new ReadValueIds/WriteValues on every call
+        self.read_ids = {name: self.make_read_id(node) for name, node in self.nodes.items()}
+        self.alarm_status_read_ids = {name: self.make_read_id(node) for name, node in self.alarm_status_nodes.items()}
+        self.write_templates = {}
+        for name, node in self.nodes.items():
+            write_value = ua.WriteValue()
+            write_value.NodeId = node.nodeid
+            write_value.AttributeId = ua.AttributeIds.Value
+            self.write_templates[name] = write_value
+
+        # Buttons are pulsed server-side when the server provides the PulseInputs method
+        self.button_names = {button.value for button in BUTTONS}
+        try:
+            self.pulse_method, = await self.get_children([[f"{self.idx}:PulseInputs"]])
+        except ua.UaStatusCodeError:
+            self.pulse_method = None
+
+    @staticmethod
+    def make_relative_path(path):
+        """
+        Relative path following hierarchical references through the browse names of the path.
+        """
+        relative_path = ua.RelativePath()
+        for name in path:
+            element = ua.RelativePathElement()
+            element.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            element.IsInverse = False
+            element.IncludeSubtypes = True
+            element.TargetName = ua.QualifiedName.from_string(name)
+            relative_path.Elements.append(element)
+        return relative_path
+
+    @staticmethod
+    def make_read_id(node):
+        read_id = ua.ReadValueId()
+        read_id.NodeId = node.nodeid
+        read_id.AttributeId = ua.AttributeIds.Value
+        return read_id
@@ -1,7 +1,18 @@
 from enum import Enum, auto
+from string import ascii_letters
 
 
-class DigitalInputs(Enum):
+class BitAddressed:
+    """
+    Mixin for the enums of the packed (one bit per signal) PLC registers.
+    Bit index is taken from the number of the signal, e.g. "DI5" -> bit 5, "A2" -> bit 2.
+    """
+    def __init__(self, value):
+        self.bit = int(value.lstrip(ascii_letters))
+        self.mask = 1 << self.bit
+
+
+class DigitalInputs(BitAddressed, Enum):
     """
     Enum class to map the Digital Inputs of the system to the PLC Inputs.
     In a real system, the inputs/outputs would be assigned
@@ -22,6 +33,16 @@ class DigitalInputs(Enum):
     DISCHARGING_GATE_CLOSED = "DI9" # Discharging gate closed
 
 
+# Push buttons, the only inputs the PulseInputs method of the simulator accepts
+BUTTONS = (
+    DigitalInputs.START_BUTTON,
+    DigitalInputs.RUN_BUTTON,
+    DigitalInputs.STOP_BUTTON,
+    DigitalInputs.ES_BUTTON,
+    DigitalInputs.RST_BUTTON,
+)
+
+
 class AnalogInputs(Enum):
     """
     Enum class to map the Analog Inputs of the system to the PLC Inputs.
@@ -29,7 +50,7 @@ class AnalogInputs(Enum):
     TEMPERATURE_SENSOR = "AI0" # Temperature sensor
 
  
-class DigitalOutputs(Enum):
+class DigitalOutputs(BitAddressed, Enum):
     """
     Enum class to map the Digital Inputs of the system to the PLC Outputs.
     """
@@ -1,9 +1,38 @@
 
 from asyncua import Server, ua
+from asyncua.common.methods import uamethod
+from asyncua.common.ua_utils import value_to_datavalue
 import asyncio
-
-from src.plc_io_definitions import DigitalInputs, AnalogInputs, DigitalOutputs
-from src.plc_utils import Steps, Transitions, PLCCommonOperations, Alarms
+import functools
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# uvloop is optional, it gives a faster event loop where available (not on Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+from src.plc_io_definitions import DigitalInputs, AnalogInputs, DigitalOutputs, BUTTONS
+from src.plc_utils import Steps, Transitions, PLCCommonOperations, Alarms, InputsSubscriptionHandler, steps_table
+
+logger = logging.getLogger(__name__)
+
+def start_logging() -> QueueListener:
+    """
+    Log through a queue, the records are written out by the listener thread,
+    so the control loop never blocks on the console I/O.
+    """
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[QueueHandler(log_queue)])
+    logging.getLogger("asyncua").setLevel(logging.WARNING)
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
 
 class PLCSimulator:
     def __init__(self):
@@ -12,44 +41,38 @@ class PLCSimulator:
         self.DESIRED_TEMPERATURE = 45.0 # Desired temperature for the heating system [Celsius]
         self.MAX_TEMPERATURE = 80.0     # Max temperature above which the heating system should be stopped [Celsius]
         self.MIN_TEMPERATURE = 10.0     # Min temperature below which the heating system should be stopped [Celsius]
+        self.INPUTS_PUBLISHING_INTERVAL = 50 # Publishing interval of the inputs subscription [miliseconds]
+        self.PORT = int(os.environ.get("PLC_SIM_PORT", 7000)) # OPC UA server port, one simulator per port
 
         # Initialize input/output and alarm registers. Complete the registers with the needed signals
-        self.digital_inputs = {
-            DigitalInputs.START_BUTTON: False,          # Start button, True when pressed, False otherwise
-            DigitalInputs.RUN_BUTTON: False,            # Run button, True when pressed, False otherwise
-            DigitalInputs.STOP_BUTTON: False,           # Stop button, True when pressed, False otherwise
-            DigitalInputs.ES_BUTTON: False,             # Emergency button, True when pressed, False otherwise
-            DigitalInputs.RST_BUTTON: False,            # Reset button, True when pressed, False otherwise
-            DigitalInputs.LL_LVL_SENSOR: False,         # Low low level sensor, True when water detected, False otherwise
-            DigitalInputs.L_LVL_SENSOR: False,          # Low level sensor, True when water detected, False otherwise
-            DigitalInputs.H_LVL_SENSOR: False,          # High level sensor, True when water detected, False otherwise
-            DigitalInputs.HH_LVL_SENSOR: False,         # High high level sensor, True when water detected, False otherwise
-            DigitalInputs.DISCHARGING_GATE_CLOSED: True # Tank discharging gate sensor. True when closed, False otherwise
-            }
+        # Digital registers are packed into ints, one bit per signal (like the I/O image of a real PLC).
+        # Bit index is the number of the signal, e.g. DI5 -> bit 5 (see BitAddressed in plc_io_definitions.py).
+        #
+        # Digital inputs, bit is 1 when:
+        #   START_BUTTON, RUN_BUTTON, STOP_BUTTON, ES_BUTTON, RST_BUTTON - button pressed
+        #   LL_LVL_SENSOR, L_LVL_SENSOR, H_LVL_SENSOR, HH_LVL_SENSOR     - water detected
+        #   DISCHARGING_GATE_CLOSED                                      - tank discharging gate closed
+        self._di = DigitalInputs.DISCHARGING_GATE_CLOSED.mask # Only the gate is closed at the start
 
         self.analog_inputs = {
             AnalogInputs.TEMPERATURE_SENSOR: 20.0 # Temperature sensor, [Celsius]
             }
 
-        self.digital_outputs = {
-            DigitalOutputs.FILLING_VALVE_OPEN: False,     # Filling system. True when on, False otherwise
-            DigitalOutputs.DISCHARGING_VALVE_OPEN: False, # Tank discharging valve (normal operation). True when open, False otherwise
-            DigitalOutputs.HEATING_ON: False,             # Heating system. True when on, False otherwise
-            DigitalOutputs.DISCHARGING_GATE_CLOSE: True  # Tank discharging gate (complete discharging). True when closed, False otherwise.
-            }
+        # Digital outputs, bit is 1 when:
+        #   FILLING_VALVE_OPEN     - filling system on
+        #   DISCHARGING_VALVE_OPEN - tank discharging valve (normal operation) open
+        #   HEATING_ON             - heating system on
+        #   DISCHARGING_GATE_CLOSE - tank discharging gate (complete discharging) closed
+        self._do = DigitalOutputs.DISCHARGING_GATE_CLOSE.mask # Only the gate is closed at the start
 
         # Alarms have Active, UnAck ("Unacknowledged"), and Status attributes
         #   Active: True if the alarm is active, False otherwise
         #   UnAck: True if the alarm is unacknowledged after it was triggered
         #   Status: True if the alarm is either active or unacknowledged
-        self.alarms = {
-            Alarms.TANK_TOO_HIGH: {"Active": False, "UnAck": False, "Status": False}, # Tank Level Too High Alarm
-            Alarms.TANK_TOO_LOW:  {"Active": False, "UnAck": False, "Status": False}, # Tank Level Too Low Alarm
-            Alarms.TEMP_TOO_HIGH: {"Active": False, "UnAck": False, "Status": False}, # Fluid Temperature Too High Alarm
-            Alarms.TEMP_TOO_LOW:  {"Active": False, "UnAck": False, "Status": False}, # Fluid Temperature Too Low Alarm
-            Alarms.DOOR_OPEN:     {"Active": False, "UnAck": False, "Status": False}, # Discharging Door Open Alarm
-            Alarms.ES_PRESSED:    {"Active": False, "UnAck": False, "Status": False}  # Emergency Button Pressed Alarm
-        }
+        # Every attribute is a packed register, with one bit per alarm (A0 -> bit 0, ..., A5 -> bit 5).
+        self._alarm_active = 0
+        self._alarm_unack = 0
+        self._alarm_status = 0
 
         # Map alarms to steps. This is used to set the step when an alarm is triggered.
         self.map_alarm_to_step = {
@@ -72,96 +95,188 @@ class PLCSimulator:
             Alarms.DOOR_OPEN,     # (A4) Discharging door open
         )
 
+        # The most urgent alarm for every possible value of the status register, None when no alarm is on.
+        # Finding the alarm to handle is then a single lookup instead of walking the priority list.
+        self._most_urgent_alarm = tuple(
+            next((alarm for alarm in self.alarms_priority_order if status & alarm.mask), None)
+            for status in range(1 << len(Alarms))
+        )
+
         self.step = Steps.STOP                 # Start with system stopped, as indicated in the original code
-        self.last_low_low_sensor_state = False # Helper variable to detect falling edge of low level sensor
+        self._di_falling = 0                   # Digital inputs with a falling edge in this cycle, same bits as _di
 
         self.transitions = Transitions(self)                       # Initialize transitions object.
         self.common_operations_handler = PLCCommonOperations(self) # Initialize common operations object.
         self.trip = False                                          # Error mode when True, normal operation when False 
 
-    async def update_inputs(self):
-        # Update digital input readings from the OPC UA server
-        # Name is the enum, value must be taken to get the string value
-        for name in self.digital_inputs.keys():
-            myvar = await self.myobj.get_child(f"{self.idx}:{name.value}")
-            value = await myvar.read_value()
-            self.digital_inputs[name] = value
-
-        # Update the analog input readings from the OPC UA server
-        for name in self.analog_inputs.keys():
-            myvar = await self.myobj.get_child(f"{self.idx}:{name.value}")
-            value = await myvar.read_value()
-            self.analog_inputs[name] = value
+        # GRAFCET steps dispatch tables, step -> method executing it (the CASE of a PLC program).
+        # Indexed directly by the step number, no hashing involved.
+        self._error_handlers = steps_table({
+            Steps.ERROR_A0: self.execute_error_a0,
+            Steps.ERROR_A1: self.execute_error_a1,
+            Steps.ERROR_A2: self.execute_error_a2,
+            Steps.ERROR_A3: self.execute_error_a3,
+            Steps.ERROR_A4: self.execute_error_a4,
+            Steps.ERROR_A5: self.execute_error_a5,
+        })
+        self._normal_handlers = steps_table({
+            Steps.STOP:              self.execute_stop,
+            Steps.PREFILLING:        self.execute_prefilling,
+            Steps.INITIALISED:       self.execute_initialised,
+            Steps.FILLING:           self.execute_filling,
+            Steps.HEATING:           self.execute_heating,
+            Steps.DISCHARGING_VALVE: self.execute_discharging_valve,
+        })
+
+        # The GRAFCET pass is memoized, after a few cycles every reachable state is a cache hit
+        self._grafcet_cycle = functools.lru_cache(maxsize=4096)(self.grafcet_cycle)
+
+        # Latest input values pushed by the OPC UA subscription, see set_opcua_server.
+        # Copied into the registers once per cycle, so the inputs don't change in the middle of a cycle.
+        self._di_shadow = self._di
+        self._ai_shadow = dict(self.analog_inputs)
+
+        # Last registers values written to the OPC UA server, only changed bits are written again.
+        # None means nothing was written yet, so the first cycle writes everything.
+        self._published_do = None
+        self._published_alarms = {"Active": None, "UnAck": None, "Status": None}
+
+        # Pending falling edges of the PulseInputs method, referenced until they are written
+        self._pulse_tasks = set()
+
+    def update_inputs(self):
+        """
+        Update digital and analog input readings.
+        Nothing is read from the OPC UA server here, the subscription keeps
+        the shadows up to date and they are just copied into the registers.
+        """
+        di_prev = self._di
+        self._di = self._di_shadow
+        self._di_falling = di_prev & ~self._di
+        for name in self.analog_inputs:
+            self.analog_inputs[name] = self._ai_shadow[name]
 
     async def write_outputs(self):
-        # Complete the necessary code to write the output values into the OPC UA server
-        # Enum again
-        for name, value in self.digital_outputs.items():
-            myvar = await self.myobj.get_child(f"{self.idx}:{name.value}")
-            await myvar.write_value(value)
+        """
+        Write the output values into the OPC UA server.
+        Only the outputs that changed since the last write are sent.
+        """
+        changed = -1 if self._published_do is None else self._do ^ self._published_do
+        if not changed:
+            return
+
+        await self.write_values({node: bool(self._do & name.mask)
+                                 for name, node in self._do_nodes.items() if changed & name.mask})
+        self._published_do = self._do
+
+    async def write_values(self, node_values: dict):
+        """
+        Write the values of several nodes straight into the server address space.
+        The simulator owns the server, so the writes skip the WriteRequest service (and its checks).
+        All nodes are written in a single hop to the server loop.
+        """
+        if not node_values:
+            return
 
-    async def update_alarms_active_state(self):
+        async def write():
+            for node, value in node_values.items():
+                await self.server.write_attribute_value(node.nodeid, value_to_datavalue(value))
+        await self.run_on_server_loop(write())
+
+    @uamethod
+    async def pulse_inputs(self, parent, names: list, width_ms: int):
+        """
+        PulseInputs method of the PLC object: raise the given buttons and lower them again after width_ms.
+        A client pulses buttons with one call instead of two WriteRequests. The call returns once the
+        buttons are raised, the falling edge is scheduled on the server loop, so the session of the
+        client is not held for the width of the pulse (a session handles its requests one at a time).
+        It runs on the server loop, the control loop sees the edges through the inputs subscription.
+        """
+        if not names or any(name not in self._button_nodes_by_name for name in names):
+            return ua.StatusCode(ua.StatusCodes.BadInvalidArgument)
+        nodes = [self._button_nodes_by_name[name] for name in names]
+        await self.write_server_values(nodes, True)
+        task = asyncio.create_task(self.lower_inputs(nodes, width_ms / 1000))
+        self._pulse_tasks.add(task)
+        task.add_done_callback(self._pulse_tasks.discard)
+
+    async def lower_inputs(self, nodes, delay):
+        """
+        Falling edge of a pulse, the inputs are lowered after delay [s].
+        """
+        await asyncio.sleep(delay)
+        await self.write_server_values(nodes, False)
+
+    async def write_server_values(self, nodes, value):
+        """
+        Write the same value into several nodes, from the server loop.
+        """
+        for node in nodes:
+            await self.server.write_attribute_value(node.nodeid, value_to_datavalue(value))
+
+    async def run_on_server_loop(self, coro):
+        """
+        Run a coroutine on the OPC UA server event loop and wait for its result from the control loop.
+        """
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._server_loop))
+
+    def update_alarms_active_state(self):
         #TODO: maybe it would be better to keep the active state untill the alarm is acknowledged, not rely only on the status
-        #TODO: Read all alarms at once, instead of one by one
-        # Tank level too high, high high level sensor active
-        self.alarms[Alarms.TANK_TOO_HIGH]["Active"] = (
-            self.digital_inputs[DigitalInputs.HH_LVL_SENSOR]  
-        )
-        # Falling edge on low low level sensor
-        self.alarms[Alarms.TANK_TOO_LOW]["Active"] = (
-            self.last_low_low_sensor_state
-            and not self.digital_inputs[DigitalInputs.LL_LVL_SENSOR]
-        )
-        # Fluid temperature too high
-        self.alarms[Alarms.TEMP_TOO_HIGH]["Active"] = (
-            self.analog_inputs[AnalogInputs.TEMPERATURE_SENSOR] > self.MAX_TEMPERATURE
+        # All alarms are computed at once, every line sets the bit of a single alarm
+        di = self._di
+        temperature = self.analog_inputs[AnalogInputs.TEMPERATURE_SENSOR]
+        self._alarm_active = (
+            # Tank level too high, high high level sensor active
+            ((di >> DigitalInputs.HH_LVL_SENSOR.bit) & 1) << Alarms.TANK_TOO_HIGH.bit
+            # Falling edge on low low level sensor
+            | ((self._di_falling >> DigitalInputs.LL_LVL_SENSOR.bit) & 1) << Alarms.TANK_TOO_LOW.bit
+            # Fluid temperature too high
+            | (temperature > self.MAX_TEMPERATURE) << Alarms.TEMP_TOO_HIGH.bit
+            # Fluid temperature too low
+            | (temperature < self.MIN_TEMPERATURE) << Alarms.TEMP_TOO_LOW.bit
+            # Discharging door open
+            | (~(di >> DigitalInputs.DISCHARGING_GATE_CLOSED.bit) & 1) << Alarms.DOOR_OPEN.bit
+            # Emergency button pressed
+            | ((di >> DigitalInputs.ES_BUTTON.bit) & 1) << Alarms.ES_PRESSED.bit
         )
-        # Fluid temperature too low
-        self.alarms[Alarms.TEMP_TOO_LOW]["Active"] = (
-            self.analog_inputs[AnalogInputs.TEMPERATURE_SENSOR] < self.MIN_TEMPERATURE
-        )
-        # Discharging door open
-        self.alarms[Alarms.DOOR_OPEN]["Active"] = (
-            not self.digital_inputs[DigitalInputs.DISCHARGING_GATE_CLOSED]
-        )
-        # Emergency button pressed
-        self.alarms[Alarms.ES_PRESSED]["Active"] = (
-            self.digital_inputs[DigitalInputs.ES_BUTTON]
-        )
-
-        self.last_low_low_sensor_state = self.digital_inputs[DigitalInputs.LL_LVL_SENSOR]
 
-    async def reset_alarms(self):
+    def reset_alarms(self):
         # Reset all alarms to inactive and acknowledged
-        for key in self.alarms.keys():
-            self.alarms[key].update({"UnAck":False})
-            self.alarms[key].update({"Status":False})
+        self._alarm_unack = 0
+        self._alarm_status = 0
+
+    def alarm_registers(self) -> dict:
+        """
+        Alarm attribute name, as published on the OPC UA server, mapped to its register.
+        """
+        return {"Active": self._alarm_active, "UnAck": self._alarm_unack, "Status": self._alarm_status}
 
     async def set_alarms(self):
         """
         If the alarm is active, set UnAck and Status to True.
         Set the values to the OPC UA server.
         """
-        for key, values in self.alarms.items():
-            myalarm = await self.myobj.get_child(f"{self.idx}:{key.value}")
-            # If the alarm is active, set UnAck and Status to True
-            if values["Active"]:
-                values["UnAck"] = True
-                values["Status"] = True
-            # Write the values to the OPC UA server
-            for newkey, value in values.items():
-                myvar = await myalarm.get_child(f"{self.idx}:{newkey}")
-                await myvar.write_value(value)
-
-    async def check_alarms_and_return_most_urgent(self):
+        # If the alarm is active, set UnAck and Status to True (for all alarms at once)
+        self._alarm_unack |= self._alarm_active
+        self._alarm_status |= self._alarm_active
+
+        # Write the changed values to the OPC UA server, all at once
+        registers = self.alarm_registers()
+        writes = {}
+        for newkey, register in registers.items():
+            published = self._published_alarms[newkey]
+            changed = -1 if published is None else register ^ published
+            for key, nodes in self._alarm_nodes.items():
+                if changed & key.mask:
+                    writes[nodes[newkey]] = bool(register & key.mask)
+        await self.write_values(writes)
+        self._published_alarms = registers
+
+    def check_alarms_and_return_most_urgent(self):
         """
         Check the alarms and return the most urgent one.
         """
-        for alarm_id in self.alarms_priority_order:
-            alarm = self.alarms[alarm_id]
-            if alarm["Status"]:
-                return alarm_id
-        return None
+        return self._most_urgent_alarm[self._alarm_status]
             
     async def handle_alarms(self):
         """
@@ -174,22 +289,86 @@ class PLCSimulator:
         4. Check if any alarm status is True. If it is, find the most urgent one.
         5. If any alarm status is True, set trip to True and step to the corresponding error state.
         """
-        if self.digital_inputs[DigitalInputs.RST_BUTTON]:
-            await self.reset_alarms()
+        if self._di & DigitalInputs.RST_BUTTON.mask:
+            self.reset_alarms()
             
-        await self.update_alarms_active_state()
+        self.update_alarms_active_state()
 
         await self.set_alarms()
-        alarm_id = await self.check_alarms_and_return_most_urgent()
+        alarm_id = self.check_alarms_and_return_most_urgent()
 
         if alarm_id:
             self.trip = True
             self.step = self.map_alarm_to_step[alarm_id]
         elif self.trip:
             self.trip = False
-            self.digital_outputs[DigitalOutputs.DISCHARGING_GATE_CLOSE] = True # Close the discharging gate
+            self._do |= DigitalOutputs.DISCHARGING_GATE_CLOSE.mask # Close the discharging gate
             self.step = Steps.STOP
 
+    # Error steps
+    def execute_error_a0(self):
+        # Handle Tank Level Too High Alarm
+        self.common_operations_handler.stop_system()
+        self._do &= ~DigitalOutputs.DISCHARGING_GATE_CLOSE.mask
+
+    def execute_error_a1(self):
+        # Handle Tank Level Too Low Alarm
+        self.common_operations_handler.stop_system()
+
+    def execute_error_a2(self):
+        # Handle Fluid Temperature Too High Alarm
+        self.common_operations_handler.stop_heating_open_gate()
+
+    def execute_error_a3(self):
+        # Handle Fluid Temperature Too Low Alarm
+        self.common_operations_handler.stop_fluid_flow_open_gate()
+
+    def execute_error_a4(self):
+        # Handle Discharging Door Open Alarm
+        self.common_operations_handler.stop_system()
+
+    def execute_error_a5(self):
+        # Handle Emergency Button Pressed Alarm
+        self.common_operations_handler.stop_system()
+        self._do &= ~DigitalOutputs.DISCHARGING_GATE_CLOSE.mask
+
+    # Normal operation steps
+    def execute_stop(self):
+        if self.transitions.start_button_pressed_and_gate_closed():
+            self.step = Steps.PREFILLING
+
+    def execute_prefilling(self):
+        if self.transitions.tank_reached_low_level():
+            self._do &= ~DigitalOutputs.FILLING_VALVE_OPEN.mask
+            self.step = Steps.INITIALISED
+        else:
+            self._do |= DigitalOutputs.FILLING_VALVE_OPEN.mask
+
+    def execute_initialised(self):
+        if self.transitions.run_button_pressed():
+            self.step = Steps.FILLING
+
+    def execute_filling(self):
+        if self.transitions.tank_reached_high_level():
+            self._do &= ~DigitalOutputs.FILLING_VALVE_OPEN.mask
+            self.step = Steps.HEATING
+        else:
+            self._do |= DigitalOutputs.FILLING_VALVE_OPEN.mask
+
+    def execute_heating(self):
+        if self.transitions.temperature_reached_setpoint():
+            self._do &= ~DigitalOutputs.HEATING_ON.mask
+            self.step = Steps.DISCHARGING_VALVE
+        else:
+            self._do |= DigitalOutputs.HEATING_ON.mask
+
+    def execute_discharging_valve(self):
+        if self.transitions.tank_back_to_low_level():
+            self._do &= ~DigitalOutputs.DISCHARGING_VALVE_OPEN.mask
+            self.step = Steps.FILLING
+        else:
+            self._do |= DigitalOutputs.DISCHARGING_VALVE_OPEN.mask
+
     async def execute_control_logic(self):
         """
         Main logic, it works in the cyclic way:
@@ -200,108 +379,62 @@ class PLCSimulator:
         """
         #NOTE: All variables moved to the constructor.
         prev_step = "unknown" #TODO: REMOVE
-        try:
-            while True:
-                # Updating inputs from server
-                await self.update_inputs()
-
-                # Handle all alarms, mark proper
-                await self.handle_alarms()
-
-                # Implement GRAFCET logic:
-                #   This should follow a state machine approach, where each state is defined by the current conditions of the inputs and outputs.
-                #   The step and transition logic should be implemented here.
-                #   For example, if a certain condition is met, change the step to "Start" or "Stop", etc.
-                if self.trip:
-                    # Error handling logic
-                    if self.step == Steps.ERROR_A0:
-                        # Handle Tank Level Too High Alarm
-                        self.common_operations_handler.stop_system()
-                        self.digital_outputs[DigitalOutputs.DISCHARGING_GATE_CLOSE] = False
-
-                    elif self.step == Steps.ERROR_A1:
-                        # Handle Tank Level Too Low Alarm
-                        self.common_operations_handler.stop_system()
-
-                    elif self.step == Steps.ERROR_A2:
-                        # Handle Fluid Temperature Too High Alarm 
-                        self.common_operations_handler.stop_heating_open_gate()
-
-                    elif self.step == Steps.ERROR_A3:
-                        # Handle Fluid Temperature Too Low Alarm
-                        self.common_operations_handler.stop_fluid_flow_open_gate()
-
-                    elif self.step == Steps.ERROR_A4:
-                        # Handle Discharging Door Open Alarm 
-                        self.common_operations_handler.stop_system()
-
-                    elif self.step == Steps.ERROR_A5:
-                        self.common_operations_handler.stop_system()
-                        self.digital_outputs[DigitalOutputs.DISCHARGING_GATE_CLOSE] = False
-                else:
-                    # Normal operation logic - executed only if no alarm status is True
-                    if self.transitions.stop_requested():
-                        self.common_operations_handler.stop_system()
-                        self.step = Steps.STOP
-
-                    elif self.step == Steps.STOP:
-                        if self.transitions.start_button_pressed_and_gate_closed():
-                            self.step = Steps.PREFILLING
-
-                    elif self.step == Steps.PREFILLING:
-                        if self.transitions.tank_reached_low_level():
-                            self.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = False
-                            self.step = Steps.INITIALISED
-                        else:
-                            self.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = True
-
-                    elif self.step == Steps.INITIALISED:
-                        if self.transitions.run_button_pressed():
-                            self.step = Steps.FILLING
-
-                    elif self.step == Steps.FILLING:
-                        if self.transitions.tank_reached_high_level():
-                            self.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = False
-                            self.step = Steps.HEATING
-                        else:
-                            self.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = True
-
-                    elif self.step == Steps.HEATING:
-                        if self.transitions.temperature_reached_setpoint():
-                            self.digital_outputs[DigitalOutputs.HEATING_ON] = False
-                            self.step = Steps.DISCHARGING_VALVE
-                        else:
-                            self.digital_outputs[DigitalOutputs.HEATING_ON] = True
-
-                    elif self.step == Steps.DISCHARGING_VALVE:
-                        if self.transitions.tank_back_to_low_level():
-                            self.digital_outputs[DigitalOutputs.DISCHARGING_VALVE_OPEN] = False
-                            self.step = Steps.FILLING
-                        else:
-                            self.digital_outputs[DigitalOutputs.DISCHARGING_VALVE_OPEN] = True
-                
-                if self.step != prev_step:
-                    print(f"State changed to -> {self.step}")
-                    prev_step = self.step
-
-                # Implement output logic:
-                #   This should set the digital outputs based on the current step and alarm conditions.
-                #   For example, the output is True when step is "Start" and no alarm is active.
-                ...
-
-                # Setting outputs on server
-                await self.write_outputs()
-
-                # Sleeping for cycle time
-                await asyncio.sleep(self.CYCLE_TIME)
-        finally:
-            await self.server.stop()
-            print("Stopping server")
+        loop = asyncio.get_running_loop()
+        while True:
+            cycle_start = loop.time()
+
+            # Updating inputs from server
+            self.update_inputs()
+
+            # Handle all alarms, mark proper
+            await self.handle_alarms()
+
+            # Implement GRAFCET logic:
+            #   This should follow a state machine approach, where each state is defined by the current conditions of the inputs and outputs.
+            #   The step and transition logic should be implemented here.
+            #   For example, if a certain condition is met, change the step to "Start" or "Stop", etc.
+            self.step, self._do = self._grafcet_cycle(self.trip, self.step, self._di, self._do,
+                                                      self.transitions.temperature_reached_setpoint())
+            
+            if self.step != prev_step:
+                logger.info("State changed to -> %s", self.step)
+                prev_step = self.step
+
+            # Implement output logic:
+            #   This should set the digital outputs based on the current step and alarm conditions.
+            #   For example, the output is True when step is "Start" and no alarm is active.
+            ...
+
+            # Setting outputs on server
+            await self.write_outputs()
+
+            # Sleeping for the rest of the cycle time, so the period stays CYCLE_TIME
+            # no matter how long the cycle body took
+            remaining = self.CYCLE_TIME - (loop.time() - cycle_start)
+            await asyncio.sleep(remaining if remaining > 0 else 0)
+
+    def grafcet_cycle(self, trip: bool, step: Steps, di: int, do: int, setpoint_reached: bool) -> tuple:
+        """
+        Execute one pass of the GRAFCET and return the new (step, outputs register).
+        The step handlers read the current input registers, the arguments are the state they
+        depend on (the temperature only through the setpoint), so the result can be memoized.
+        """
+        self.step, self._do = step, do
+        if trip:
+            # Error handling logic
+            self._error_handlers[step]()
+        elif self.transitions.stop_requested():
+            # Normal operation logic - executed only if no alarm status is True
+            self.common_operations_handler.stop_system()
+            self.step = Steps.STOP
+        else:
+            self._normal_handlers[step]()
+        return self.step, self._do
 
     async def set_opcua_server(self):
         self.server = Server()
         await self.server.init() 
-        self.server.set_endpoint("opc.tcp://localhost:7000/freeopcua/server/")
+        self.server.set_endpoint(f"opc.tcp://localhost:{self.PORT}/freeopcua/server/")
 
         # setup our own namespace, not really necessary but should as spec
         uri = "http://examples.freeopcua.github.io"
@@ -314,38 +447,92 @@ class PLCSimulator:
         self.myobj = await objects.add_object(self.idx, "myPLC")
         
         # For me key is enum, I have to refer to key.value to get the string value
-        for key, value in self.digital_inputs.items():
-            myvar = await self.myobj.add_variable(self.idx, key.value, value)
+        # Created nodes are cached (same keys as the registers) so the cycle never has to
+        # resolve them again with get_child, which is a browse round-trip every time.
+        self._di_nodes = {}
+        self._ai_nodes = {}
+        self._do_nodes = {}
+        self._alarm_nodes = {}
+        for key in DigitalInputs:
+            myvar = await self.myobj.add_variable(self.idx, key.value, bool(self._di & key.mask))
             await myvar.set_writable()
+            self._di_nodes[key] = myvar
+        self._button_nodes_by_name = {key.value: self._di_nodes[key] for key in BUTTONS}
+        names_argument = ua.Argument()
+        names_argument.Name = "Names"
+        names_argument.DataType = ua.NodeId(ua.ObjectIds.String)
+        names_argument.ValueRank = 1  # One-dimensional array
+        names_argument.ArrayDimensions = [0]
+        names_argument.Description = ua.LocalizedText("Browse names of the buttons to pulse")
+        width_argument = ua.Argument()
+        width_argument.Name = "WidthMs"
+        width_argument.DataType = ua.NodeId(ua.ObjectIds.UInt32)
+        width_argument.ValueRank = -1  # Scalar
+        width_argument.Description = ua.LocalizedText("Width of the pulse [ms]")
+        await self.myobj.add_method(self.idx, "PulseInputs", self.pulse_inputs,
+                                    [names_argument, width_argument], [])
         for key, value in self.analog_inputs.items():
             myvar = await self.myobj.add_variable(self.idx, key.value, value)
             await myvar.set_writable()
-        for key, value in self.digital_outputs.items():
-            myvar = await self.myobj.add_variable(self.idx, key.value, value)
+            self._ai_nodes[key] = myvar
+        for key in DigitalOutputs:
+            myvar = await self.myobj.add_variable(self.idx, key.value, bool(self._do & key.mask))
             await myvar.set_writable()
-        for key, values in self.alarms.items():
+            self._do_nodes[key] = myvar
+        for key in Alarms:
             myalarm = await self.myobj.add_object(self.idx, key.value)
-            for newkey, value in values.items():
-                myvar = await myalarm.add_variable(self.idx, newkey, value)
+            self._alarm_nodes[key] = {}
+            for newkey, register in self.alarm_registers().items():
+                myvar = await myalarm.add_variable(self.idx, newkey, bool(register & key.mask))
                 await myvar.set_writable()
+                self._alarm_nodes[key][newkey] = myvar
 
         # starting!
         await self.server.start()
-        print("Server started")
+        logger.info("Server started")
+
+        # Inputs are pushed on change instead of being polled every cycle
+        input_nodes = {**self._di_nodes, **self._ai_nodes}
+        handler = InputsSubscriptionHandler(self, {node.nodeid: key for key, node in input_nodes.items()})
+        self._inputs_subscription = await self.server.create_subscription(self.INPUTS_PUBLISHING_INTERVAL, handler)
+        await self._inputs_subscription.subscribe_data_change(list(input_nodes.values()))
 
     async def stop(self):
         await self.server.stop()
 
+    def run_control_logic(self, done: asyncio.Future):
+        """
+        Control thread target. Execute the cycle program in its own event loop
+        and report back to the server loop when it ends.
+        """
+        try:
+            asyncio.run(self.execute_control_logic())
+        except BaseException as error:
+            self._server_loop.call_soon_threadsafe(done.set_exception, error)
+        else:
+            self._server_loop.call_soon_threadsafe(done.set_result, None)
+
     async def main(self):
         # Set OPC UA server
         await self.set_opcua_server()
 
-        # Execute cycle program
-        await self.execute_control_logic()
+        # Execute cycle program in a dedicated thread, so the server traffic does not delay the cycles.
+        # Inputs come from the subscription shadows, only the writes cross back into the server loop.
+        self._server_loop = asyncio.get_running_loop()
+        done = self._server_loop.create_future()
+        threading.Thread(target=self.run_control_logic, args=(done,), name="plc-control", daemon=True).start()
+        try:
+            await done
+        finally:
+            await self.server.stop()
+            logger.info("Stopping server")
 
 if __name__ == "__main__":
+    listener = start_logging()
     plc = PLCSimulator()
     try:
         asyncio.run(plc.main())
     except KeyboardInterrupt:
-        print("PLC stopped")
+        logger.info("PLC stopped")
+    finally:
+        listener.stop()
@@ -2,11 +2,11 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from src.plc_simulator import PLCSimulator
 
-from enum import Enum, auto
-from src.plc_io_definitions import DigitalInputs, AnalogInputs, DigitalOutputs
+from enum import Enum, IntEnum, auto
+from src.plc_io_definitions import DigitalInputs, AnalogInputs, DigitalOutputs, BitAddressed
 
 
-class Alarms(Enum):
+class Alarms(BitAddressed, Enum):
     """
     Map the alarms to something a bit more readable.
     Encapsulate the logic.
@@ -19,10 +19,13 @@ class Alarms(Enum):
     ES_PRESSED = "A5"
 
 
-class Steps(Enum):
+class Steps(IntEnum):
     """
     Enum class to define the States of the system.
+    Steps are ints, so tables indexed by step (see steps_table) can be plain tuples.
     """
+    __str__ = Enum.__str__ # Keep "Steps.STOP" in prints and test ids, not just the number
+
     # Normal operation states
     STOP = auto() # Default state
     PREFILLING = auto()
@@ -40,6 +43,14 @@ class Steps(Enum):
     ERROR_A5 = auto() # Emergency Button Pressed Alarm 
 
 
+def steps_table(values: dict) -> tuple:
+    """
+    Turn a {step: value} dict into a tuple indexed directly by the step number.
+    Steps missing in the dict are None.
+    """
+    return tuple(values.get(step) for step in range(max(Steps) + 1))
+
+
 class Transitions:
     """
     This class exists only to improve readability of the code.
@@ -48,28 +59,54 @@ class Transitions:
     def __init__(self, plc: "PLCSimulator"):
         self.plc = plc
 
+        # Everything the predicates need is looked up once here, they are called every cycle.
+        # analog_inputs is updated in place by the PLC, so the reference stays valid.
+        self._ai = plc.analog_inputs
+        self._desired_temperature = plc.DESIRED_TEMPERATURE
+        self._start_mask = DigitalInputs.START_BUTTON.mask | DigitalInputs.DISCHARGING_GATE_CLOSED.mask
+        self._run_mask = DigitalInputs.RUN_BUTTON.mask
+        self._stop_mask = DigitalInputs.STOP_BUTTON.mask
+        self._l_lvl_mask = DigitalInputs.L_LVL_SENSOR.mask
+        self._h_lvl_mask = DigitalInputs.H_LVL_SENSOR.mask
+
     def start_button_pressed_and_gate_closed(self) -> bool:
-        return (self.plc.digital_inputs[DigitalInputs.START_BUTTON]
-                and self.plc.digital_inputs[DigitalInputs.DISCHARGING_GATE_CLOSED])
+        return (self.plc._di & self._start_mask) == self._start_mask
 
     def tank_reached_low_level(self) -> bool:
-        return self.plc.digital_inputs[DigitalInputs.L_LVL_SENSOR]
+        return (self.plc._di & self._l_lvl_mask) != 0
 
     def run_button_pressed(self) -> bool:
-        return self.plc.digital_inputs[DigitalInputs.RUN_BUTTON]
+        return (self.plc._di & self._run_mask) != 0
 
     def tank_reached_high_level(self) -> bool:
-        return self.plc.digital_inputs[DigitalInputs.H_LVL_SENSOR]
+        return (self.plc._di & self._h_lvl_mask) != 0
 
     def temperature_reached_setpoint(self) -> bool:
-        return (self.plc.analog_inputs[AnalogInputs.TEMPERATURE_SENSOR]
-                >= self.plc.DESIRED_TEMPERATURE)
+        return self._ai[AnalogInputs.TEMPERATURE_SENSOR] >= self._desired_temperature
 
     def tank_back_to_low_level(self) -> bool:
-        return not self.plc.digital_inputs[DigitalInputs.L_LVL_SENSOR]
+        return (self.plc._di & self._l_lvl_mask) == 0
 
     def stop_requested(self) -> bool:
-        return self.plc.digital_inputs[DigitalInputs.STOP_BUTTON]
+        return (self.plc._di & self._stop_mask) != 0
+
+
+class InputsSubscriptionHandler:
+    """
+    OPC UA subscription handler for the PLC inputs.
+    Every data change is written into the PLC inputs shadows, the PLC copies
+    them into its registers at the beginning of the cycle.
+    """
+    def __init__(self, plc: "PLCSimulator", node_to_input: dict):
+        self.plc = plc
+        self.node_to_input = node_to_input # NodeId -> DigitalInputs/AnalogInputs member
+
+    def datachange_notification(self, node, val, data):
+        signal = self.node_to_input[node.nodeid]
+        if isinstance(signal, DigitalInputs):
+            self.plc._di_shadow = (self.plc._di_shadow & ~signal.mask) | (signal.mask if val else 0)
+        else:
+            self.plc._ai_shadow[signal] = val
 
 
 class PLCCommonOperations:
@@ -80,25 +117,30 @@ class PLCCommonOperations:
     def __init__(self, plc: "PLCSimulator"):
         self.plc = plc
 
+        # Outputs register masks (bits to keep) of every operation, computed only once
+        self._stop_system_mask = ~(DigitalOutputs.FILLING_VALVE_OPEN.mask
+                                   | DigitalOutputs.HEATING_ON.mask
+                                   | DigitalOutputs.DISCHARGING_VALVE_OPEN.mask)
+        self._stop_heating_open_gate_mask = ~(DigitalOutputs.HEATING_ON.mask
+                                              | DigitalOutputs.DISCHARGING_GATE_CLOSE.mask)
+        self._stop_fluid_flow_open_gate_mask = ~(DigitalOutputs.FILLING_VALVE_OPEN.mask
+                                                 | DigitalOutputs.DISCHARGING_VALVE_OPEN.mask
+                                                 | DigitalOutputs.DISCHARGING_GATE_CLOSE.mask)
+
     def stop_system(self):
         """
         Stop the system.
         """
-        self.plc.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = False
-        self.plc.digital_outputs[DigitalOutputs.HEATING_ON] = False
-        self.plc.digital_outputs[DigitalOutputs.DISCHARGING_VALVE_OPEN] = False
+        self.plc._do &= self._stop_system_mask
 
     def stop_heating_open_gate(self):
         """
         Stop heating and open the discharging gate.
         """
-        self.plc.digital_outputs[DigitalOutputs.HEATING_ON] = False
-        self.plc.digital_outputs[DigitalOutputs.DISCHARGING_GATE_CLOSE] = False
+        self.plc._do &= self._stop_heating_open_gate_mask
         
     def stop_fluid_flow_open_gate(self):
         """
         Stop fluid flow and open the discharging gate.
         """
-        self.plc.digital_outputs[DigitalOutputs.FILLING_VALVE_OPEN] = False
-        self.plc.digital_outputs[DigitalOutputs.DISCHARGING_VALVE_OPEN] = False
-        self.plc.digital_outputs[DigitalOutputs.DISCHARGING_GATE_CLOSE] = False
+        self.plc._do &= self._stop_fluid_flow_open_gate_mask
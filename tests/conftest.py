@@ -0,0 +1,59 @@
+#################################
+# Fixtures shared by all test modules.
+#################################
+
+import asyncio
+import os
+import pytest
+import pytest_asyncio
+
+from src.plc_client import PLCClient
+from tests.helpers_test import reset_plc_to_clean_stop_state
+
+# uvloop is optional, it gives a faster event loop where available (not on Windows)
+try:
+    import uvloop
+    new_event_loop = uvloop.new_event_loop
+except ImportError:
+    new_event_loop = asyncio.new_event_loop
+
+# Port of the simulator, with pytest-xdist every worker talks to its own simulator: gw<N> -> port + N
+# (see src/launch_simulators.py)
+SERVER_PORT = int(os.environ.get("PLC_SIM_PORT", 7000))
+SERVER_PORT += int(os.environ.get("PYTEST_XDIST_WORKER", "gw0").removeprefix("gw"))
+SERVER_URL = os.environ.get("PLC_SIM_URL", f"opc.tcp://localhost:{SERVER_PORT}/freeopcua/server/")
+CLIENT_TIMEOUT = 5  # seconds
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """
+    Single event loop for the whole session, the session-scoped client lives on it.
+    """
+    loop = new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def plc_session() -> PLCClient:
+    """
+    Instance of the OPC UA client to communicate with the simulator.
+    Connected once for the whole session, the plc fixture resets the PLC on top of it.
+    """
+    plc = PLCClient(url=SERVER_URL, timeout=CLIENT_TIMEOUT)
+    await plc.init()
+    # Every object is watched through one subscription, the waits of the tests are notified instead of polling
+    await plc.watch_object_values(list(plc.nodes))
+    await plc.watch_alarm_statuses()
+    yield plc
+    await plc.disconnect()
+
+
+@pytest_asyncio.fixture()
+async def plc(plc_session: PLCClient) -> PLCClient:
+    """
+    Session client with the PLC back in the STOP state, with initial inputs and no alarms.
+    """
+    await reset_plc_to_clean_stop_state(plc_session)
+    return plc_session
@@ -16,11 +16,12 @@
 ##############################
 
 
-import asyncio
-import pytest
 import pytest_asyncio
 
 from src.plc_client import PLCClient
+from src.plc_io_definitions import DigitalOutputs
+
+from tests.helpers_test import wait_until_expected_output
 
 SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
 CLIENT_TIMEOUT = 5  # seconds
@@ -34,25 +35,19 @@ async def plc() -> PLCClient:
     await plc.disconnect()
 
 # Press START button and check that tank is filling
-@pytest.mark.asyncio
 async def test_start_prefilling(plc: PLCClient):
-    # Assert initial conditions
-    assert await plc.get_object_value("DQ0") == False # Tank is not filling
-    assert await plc.get_object_value("DQ1") == False # Tank is not discharging
-    assert await plc.get_object_value("DQ2") == False # Liquid is not heating
+    # Assert initial conditions: tank is not filling, not discharging, liquid is not heating
+    assert await plc.get_object_values(["DQ0", "DQ1", "DQ2"]) == [False, False, False]
     
     # Simulate pressing the START button
     await plc.set_object_pulse("DI0") # Press START button
-    await asyncio.sleep(1) # Waiting for transition into next step
+    await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, True, timeout=2.0) # Waiting for transition into next step
     
-    # Assert actuations after pressing START button
-    assert await plc.get_object_value("DQ0") == True # Tank is filling
-    assert await plc.get_object_value("DQ1") == False # Tank is not discharging
-    assert await plc.get_object_value("DQ2") == False # Liquid is not heating
+    # Assert actuations after pressing START button: tank is filling, not discharging, liquid is not heating
+    assert await plc.get_object_values(["DQ0", "DQ1", "DQ2"]) == [True, False, False]
 
 # Test low level has been reached
-# @pytest.mark.asyncio
-# async def test_prefilling_ready(plc: PLCClient):
+# # async def test_prefilling_ready(plc: PLCClient):
 #     # Simulate low level reached
 #     pass
 # Test RUN button pressed
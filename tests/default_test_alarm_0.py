@@ -13,10 +13,12 @@
 ##############################
 
 import asyncio
-import pytest
 import pytest_asyncio
 
 from src.plc_client import PLCClient
+from src.plc_io_definitions import DigitalOutputs
+
+from tests.helpers_test import wait_until_expected_output
 
 SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
 CLIENT_TIMEOUT = 5  # seconds
@@ -30,16 +32,14 @@ async def plc() -> PLCClient:
     # Set initial conditions here:
     # Stop
     await plc.set_object_pulse("DI0") # Pressed START button
-    await asyncio.sleep(1)
+    await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, True, timeout=2)
     # PreFilling
-    await plc.set_object_value("DI5", True) # Minimum levels reached
-    await plc.set_object_value("DI6", True)
-    await asyncio.sleep(1)
+    await plc.set_object_values(["DI5", "DI6"], [True, True]) # Minimum levels reached
+    await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, False, timeout=2)
     # Ready
-    await plc.set_object_pulse("DI4") # First Reset errors for a clean start
-    await asyncio.sleep(1)
+    await plc.set_object_pulse("DI4") # First Reset errors for a clean start, the pulse spans several PLC cycles
     await plc.set_object_pulse("DI1") # Pressed RUN button
-    await asyncio.sleep(1)
+    await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, True, timeout=2)
     # Filling...
 
     # Yield fixture
@@ -49,7 +49,6 @@ async def plc() -> PLCClient:
     await plc.disconnect()
 
 # Trigger overfilling condition
-@pytest.mark.asyncio
 async def test_fillingheating_overfilling(plc: PLCClient):
     # Assert initial conditions
     assert await plc.get_object_value("DQ0") == True # Tank was filling
@@ -4,6 +4,8 @@
 #################################
 
 import asyncio
+import os
+import pytest
 from src.plc_utils import Alarms, Steps
 from src.plc_io_definitions import AnalogInputs, DigitalInputs, DigitalOutputs
 from src.plc_client import PLCClient
@@ -12,9 +14,130 @@ from src.plc_client import PLCClient
 # Deafault was 1 second.
 DEFAULT_TIMEOUT = 1
 
+# Time a state is checked to be stable after a stimulus that should have no effect, e.g.
+# pressing buttons ignored in the current step. A button pulse already lasts longer than
+# two PLC cycles, so any reaction is visible when it ends.
+STABILITY_WINDOW = float(os.environ.get("PLC_STABILITY_WINDOW", 0.05))
+
+# Operational steps the alarm tests trigger their alarm from
+ALARM_STEPS = [
+    Steps.STOP,
+    Steps.PREFILLING,
+    Steps.INITIALISED,
+    Steps.FILLING,
+    Steps.HEATING,
+    Steps.DISCHARGING_VALVE,
+]
+
+
+def alarm_steps(redundant=()):
+    """
+    ALARM_STEPS with the given steps marked 'redundant', a quick run leaves them out with:
+    pytest -m "not redundant"
+    Only meant for steps whose outputs already equal the expected alarm reaction, so the test
+    can not tell the reaction apart from the step itself.
+    """
+    return [pytest.param(step, marks=pytest.mark.redundant) if step in redundant else step
+            for step in ALARM_STEPS]
+
+# Names of the PLC objects, looked up once at import instead of on every helper call
+_FVO = DigitalOutputs.FILLING_VALVE_OPEN.value
+_DVO = DigitalOutputs.DISCHARGING_VALVE_OPEN.value
+_DGC = DigitalOutputs.DISCHARGING_GATE_CLOSE.value
+_HON = DigitalOutputs.HEATING_ON.value
+_LL = DigitalInputs.LL_LVL_SENSOR.value
+_L = DigitalInputs.L_LVL_SENSOR.value
+_H = DigitalInputs.H_LVL_SENSOR.value
+_HH = DigitalInputs.HH_LVL_SENSOR.value
+_GATE = DigitalInputs.DISCHARGING_GATE_CLOSED.value
+_ES = DigitalInputs.ES_BUTTON.value
+_START = DigitalInputs.START_BUTTON.value
+_RUN = DigitalInputs.RUN_BUTTON.value
+_STOP = DigitalInputs.STOP_BUTTON.value
+_RST = DigitalInputs.RST_BUTTON.value
+_TEMP = AnalogInputs.TEMPERATURE_SENSOR.value
+_ALARM_IDS = tuple(alarm.value for alarm in Alarms)
+
+# Names of the objects checked by the assertion helpers and their expected values, built once at import
+_A0_NAMES = (_FVO, _DVO, _DGC)
+_A0_EXPECTED = [False, False, False]
+_A1_NAMES = (_FVO, _DVO)
+_A1_EXPECTED = [False, False]
+_A2_NAMES = (_HON, _DGC)
+_A2_EXPECTED = [False, False]
+_A3_NAMES = (_FVO, _DVO, _DGC)
+_A3_EXPECTED = [False, False, False]
+_A4_NAMES = (_FVO, _DVO, _HON)
+_A4_EXPECTED = [False, False, False]
+_A5_NAMES = (_FVO, _DVO, _HON, _DGC)
+_A5_EXPECTED = [False, False, False, False]
+_STOPPED_NAMES = (_FVO, _HON, _DVO)
+_STOPPED_EXPECTED = [False, False, False]
+_BUTTONS_NAMES = (_START, _RUN, _STOP, _ES, _RST)
+_BUTTONS_EXPECTED = [False, False, False, False, False]
+_ALARMS_OFF_EXPECTED = [False] * len(_ALARM_IDS)
+
+# Objects of a device snapshot, read in a single request by snapshot()
+SNAPSHOT_OBJECTS = (
+    DigitalOutputs.FILLING_VALVE_OPEN,
+    DigitalOutputs.DISCHARGING_VALVE_OPEN,
+    DigitalOutputs.DISCHARGING_GATE_CLOSE,
+    DigitalOutputs.HEATING_ON,
+    DigitalInputs.DISCHARGING_GATE_CLOSED,
+    AnalogInputs.TEMPERATURE_SENSOR,
+    DigitalInputs.LL_LVL_SENSOR,
+    DigitalInputs.L_LVL_SENSOR,
+    DigitalInputs.H_LVL_SENSOR,
+    DigitalInputs.HH_LVL_SENSOR,
+    DigitalInputs.START_BUTTON,
+    DigitalInputs.RUN_BUTTON,
+    DigitalInputs.STOP_BUTTON,
+    DigitalInputs.ES_BUTTON,
+    DigitalInputs.RST_BUTTON,
+)
+_SNAPSHOT_NAMES = [obj.value for obj in SNAPSHOT_OBJECTS]
+
+# Inputs of the 'STOP' state, restored by set_default_inputs
+DEFAULT_INPUTS = {
+    _LL: False,
+    _L: False,
+    _H: False,
+    _HH: False,
+    _GATE: True,
+    _TEMP: 20.0,
+    _ES: False,
+}
+
 async def assert_all_alarms_off(plc: PLCClient):
-    for alarm in Alarms:
-        assert await plc.get_alarm_status(alarm.value) == False
+    assert await plc.get_alarm_statuses(_ALARM_IDS) == _ALARMS_OFF_EXPECTED
+
+
+async def assert_alarm_status(plc: PLCClient, alarm: str, expected: bool):
+    """
+    Assert the Status of a single alarm.
+    """
+    assert await plc.get_alarm_status(alarm) is expected
+
+
+async def await_alarm_statuses(plc: PLCClient, expected: dict, timeout=DEFAULT_TIMEOUT) -> bool:
+    """
+    Wait until the alarms reach the expected Status ({alarm: status}), at most timeout [s].
+    The statuses watched by the client (see conftest) are notified by the server, otherwise they
+    are polled. Nothing is raised on timeout, the tests assert the Status afterwards with a read.
+    """
+    if plc.alarm_statuses is not None:
+        return await plc.wait_for_alarm_statuses(expected, timeout)
+
+    async def reached():
+        return await plc.get_alarm_statuses(list(expected)) == list(expected.values())
+    return await await_condition(reached, timeout)
+
+
+async def await_all_alarms_off(plc: PLCClient, timeout=DEFAULT_TIMEOUT) -> bool:
+    """
+    Wait until no alarm Status is left, at most timeout [s]. Same as await_alarm_statuses.
+    """
+    return await await_alarm_statuses(plc, dict.fromkeys(_ALARM_IDS, False), timeout)
 
 
 async def assert_proper_alarm_a0_reaction(plc: PLCClient):
@@ -24,9 +147,7 @@ async def assert_proper_alarm_a0_reaction(plc: PLCClient):
     - Discharging valve closed
     - Discharging gate open
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_GATE_CLOSE.value) == False
+    assert await plc.get_object_values(_A0_NAMES) == _A0_EXPECTED
 
 
 async def assert_proper_alarm_a1_reaction(plc: PLCClient):
@@ -38,8 +159,7 @@ async def assert_proper_alarm_a1_reaction(plc: PLCClient):
     - Filling valve closed
     - Discharging valve closed (not gate)
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
+    assert await plc.get_object_values(_A1_NAMES) == _A1_EXPECTED
 
 
 async def assert_proper_alarm_a2_reaction(plc: PLCClient):
@@ -48,8 +168,7 @@ async def assert_proper_alarm_a2_reaction(plc: PLCClient):
     - Heating off
     - Discharging gate open
     """
-    assert await plc.get_object_value(DigitalOutputs.HEATING_ON.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_GATE_CLOSE.value) == False
+    assert await plc.get_object_values(_A2_NAMES) == _A2_EXPECTED
 
 
 async def assert_proper_alarm_a3_reaction(plc: PLCClient):
@@ -61,9 +180,7 @@ async def assert_proper_alarm_a3_reaction(plc: PLCClient):
     - Filling valve closed
     - Discharging gate open
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_GATE_CLOSE.value) == False
+    assert await plc.get_object_values(_A3_NAMES) == _A3_EXPECTED
 
 
 async def assert_proper_alarm_a4_reaction(plc: PLCClient):
@@ -71,9 +188,7 @@ async def assert_proper_alarm_a4_reaction(plc: PLCClient):
     Assert expected state when A4 is active (Discharging Door Open):
     - All valves should be off
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.HEATING_ON.value) == False
+    assert await plc.get_object_values(_A4_NAMES) == _A4_EXPECTED
 
 
 async def assert_proper_alarm_a5_reaction(plc: PLCClient):
@@ -81,39 +196,53 @@ async def assert_proper_alarm_a5_reaction(plc: PLCClient):
     Assert expected state when A5 (Emergency Stop) is active:
     - All actuators off
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.HEATING_ON.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_GATE_CLOSE.value) == False
+    assert await plc.get_object_values(_A5_NAMES) == _A5_EXPECTED
 
 async def assert_system_stopped(plc: PLCClient):
     """
     Assert that the system is stopped. We do not consider discharge gate, rest should be
     inactive/closed.
     """
-    assert await plc.get_object_value(DigitalOutputs.FILLING_VALVE_OPEN.value) == False
-    assert await plc.get_object_value(DigitalOutputs.HEATING_ON.value) == False
-    assert await plc.get_object_value(DigitalOutputs.DISCHARGING_VALVE_OPEN.value) == False
+    assert await plc.get_object_values(_STOPPED_NAMES) == _STOPPED_EXPECTED
 
 async def assert_all_buttons_off(plc: PLCClient):
     """
     Assert all buttons are in 'off' state.
     """
-    assert await plc.get_object_value(DigitalInputs.START_BUTTON.value) == False
-    assert await plc.get_object_value(DigitalInputs.RUN_BUTTON.value) == False
-    assert await plc.get_object_value(DigitalInputs.STOP_BUTTON.value) == False
-    assert await plc.get_object_value(DigitalInputs.ES_BUTTON.value) == False
-    assert await plc.get_object_value(DigitalInputs.RST_BUTTON.value) == False
+    assert await plc.get_object_values(_BUTTONS_NAMES) == _BUTTONS_EXPECTED
         
 
 async def assert_lvl_sensor_states(plc: PLCClient, LL: bool, L: bool, H: bool, HH: bool):
     """
     Assert the states of the level sensors.
     """
-    assert await plc.get_object_value(DigitalInputs.LL_LVL_SENSOR.value) == LL
-    assert await plc.get_object_value(DigitalInputs.L_LVL_SENSOR.value) == L
-    assert await plc.get_object_value(DigitalInputs.H_LVL_SENSOR.value) == H
-    assert await plc.get_object_value(DigitalInputs.HH_LVL_SENSOR.value) == HH
+    assert await plc.get_object_values([_LL, _L, _H, _HH]) == [LL, L, H, HH]
+
+
+async def snapshot(plc: PLCClient) -> dict:
+    """
+    Read the whole device snapshot at once, keyed by the I/O enum members.
+    """
+    return dict(zip(SNAPSHOT_OBJECTS, await plc.get_object_values(_SNAPSHOT_NAMES)))
+
+
+async def assert_snapshot(plc: PLCClient, expected: dict):
+    """
+    Assert the device snapshot matches the expected one (SNAPSHOT_OBJECTS -> value).
+    Compared as a whole, so pytest reports every differing object.
+    """
+    assert await snapshot(plc) == expected
+
+
+async def await_snapshot(plc: PLCClient, expected: dict, timeout=DEFAULT_TIMEOUT) -> bool:
+    """
+    Wait until the device snapshot matches the expected one, at most timeout [s].
+    The values watched by the client (see conftest) are notified by the server, so nothing is polled,
+    otherwise it falls back to await_condition. Nothing is raised on timeout, like await_condition.
+    """
+    if plc.latest_values is None:
+        return await await_condition(passing(assert_snapshot, plc, expected), timeout)
+    return await plc.wait_for_object_values({obj.value: value for obj, value in expected.items()}, timeout)
 
 
 async def assert_device_state_changed_only(
@@ -129,9 +258,10 @@ async def assert_device_state_changed_only(
         previous_state: Full snapshot of relevant state before the action.
         expected_changes: Subset of keys with expected new values.
     """
-    for key, old_value in previous_state.items():
-        current_value = await plc.get_object_value(key.value)
-        expected_value = expected_changes.get(key, old_value)
+    keys = list(previous_state)
+    current_values = await plc.get_object_values([key.value for key in keys])
+    for key, current_value in zip(keys, current_values):
+        expected_value = expected_changes.get(key, previous_state[key])
         assert current_value == expected_value, (
             f"{key.name} changed unexpectedly: expected {expected_value}, got {current_value}"
         )
@@ -141,14 +271,7 @@ async def set_default_inputs(plc: PLCClient):
     """
     Set all digital and analog inputs to default 'STOP' state values.
     """
-    async with asyncio.TaskGroup() as tg:
-        tg.create_task(plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, False))
-        tg.create_task(plc.set_object_value(DigitalInputs.L_LVL_SENSOR.value, False))
-        tg.create_task(plc.set_object_value(DigitalInputs.H_LVL_SENSOR.value, False))
-        tg.create_task(plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, False))
-        tg.create_task(plc.set_object_value(DigitalInputs.DISCHARGING_GATE_CLOSED.value, True))
-        tg.create_task(plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 20.0))
-        tg.create_task(plc.set_object_value(DigitalInputs.ES_BUTTON.value, False))
+    await plc.restore_state(DEFAULT_INPUTS)
 
 
 async def press_buttons_at_once(plc: PLCClient,
@@ -160,61 +283,160 @@ async def press_buttons_at_once(plc: PLCClient,
     Press all specified buttons at once. Do not consider the ES, as it would
     override everything else.
     """
-    async with asyncio.TaskGroup() as tg:
-        if run_bt:
-            tg.create_task(plc.set_object_pulse(DigitalInputs.RUN_BUTTON.value))
-        if stop_bt:
-            tg.create_task(plc.set_object_pulse(DigitalInputs.STOP_BUTTON.value))
-        if reset_bt:
-            tg.create_task(plc.set_object_pulse(DigitalInputs.RST_BUTTON.value))
-        if start_bt:
-            tg.create_task(plc.set_object_pulse(DigitalInputs.START_BUTTON.value))
+    buttons = [name for name, pressed in ((_RUN, run_bt), (_STOP, stop_bt), (_RST, reset_bt), (_START, start_bt))
+               if pressed]
+    await plc.set_object_pulses(buttons)
 
 
 async def reset_plc_to_clean_stop_state(plc: PLCClient):
     """
     Reset the PLC to a clean STOP state with no alarms or active processes.
     """
-    # Set default input values
+    # Set default input values, the STOP pulse is longer than a PLC cycle, so they are in place before it ends
     await set_default_inputs(plc)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
 
     # STOP button pressed - complete reset
-    await plc.set_object_pulse(DigitalInputs.STOP_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-
-    # RESET button pressed - reset any alarms
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_pulse(_STOP)
+    assert await wait_until_outputs_settled(plc, {
+        DigitalOutputs.FILLING_VALVE_OPEN: False,
+        DigitalOutputs.DISCHARGING_VALVE_OPEN: False,
+        DigitalOutputs.HEATING_ON: False,
+    }), "PLC did not stop"
+
+    # RESET button pressed - reset any alarms. The gate is closed again once no alarm is left.
+    # The alarm statuses are notified through their own subscription, not synchronised with the
+    # outputs one, so they are waited for as well.
+    await plc.set_object_pulse(_RST)
+    assert await wait_until_outputs_settled(plc, {DigitalOutputs.DISCHARGING_GATE_CLOSE: True}), \
+        "PLC did not close the discharging gate after RST"
+    assert await await_all_alarms_off(plc), "PLC did not reach a clean STOP, alarms left after RST"
 
 
 async def wait_until_expected_output(plc: PLCClient,
                                      output: DigitalOutputs,
                                      expected_out: bool,
-                                     timeout=5.0,
-                                     poll_interval=0.1):
+                                     timeout=5.0):
     """
     Wait until a specific digital output reaches the expected boolean value.
+    The outputs watched by the client (see conftest) are notified by the server, so nothing is
+    polled. A client watching nothing falls back to polling.
 
     Args:
         plc: The PLC client instance.
         output: DigitalOutputs enum member.
         expected_out: True or False, the desired output state.
         timeout: Maximum time to wait [s].
-        poll_interval: Time between checks [s]].
     """
+    if plc.latest_values is None:
+        await poll_until_expected_output(plc, output, expected_out, timeout)
+        return
+    if not await plc.wait_for_object_values({output.value: expected_out}, timeout):
+        raise TimeoutError(
+            f"Timeout: Output {output.name} did not change to {expected_out} within {timeout}s."
+        )
+
+
+async def poll_until_expected_output(plc: PLCClient,
+                                     output: DigitalOutputs,
+                                     expected_out: bool,
+                                     timeout=5.0):
+    """
+    Polling version of wait_until_expected_output, used when the client watches nothing.
+    Most outputs change within a PLC cycle, so the polling starts at 5 ms and backs off
+    exponentially up to 100 ms.
+
+    Args:
+        plc: The PLC client instance.
+        output: DigitalOutputs enum member.
+        expected_out: True or False, the desired output state.
+        timeout: Maximum time to wait [s].
+    """
+    delay = 0.005
     time_passed = 0.0
-    while True:
-        if time_passed >= timeout:
-            raise TimeoutError(
-                f"Timeout: Output {output.name} did not change to {expected_out} within {timeout}s."
-            )
-
-        current_val = await plc.get_object_value(output.value)
-        if current_val == expected_out:
+    while time_passed < timeout:
+        if await plc.get_object_value(output.value) == expected_out:
             return
-        await asyncio.sleep(poll_interval)
-        time_passed += poll_interval
+        await asyncio.sleep(delay)
+        time_passed += delay
+        delay = min(delay * 2, 0.1)
+    raise TimeoutError(
+        f"Timeout: Output {output.name} did not change to {expected_out} within {timeout}s."
+    )
+
+
+async def wait_until_outputs_settled(plc: PLCClient, expected_outputs: dict, timeout=DEFAULT_TIMEOUT) -> bool:
+    """
+    Wait until all outputs reach the expected values, at most timeout [s].
+    It replaces a fixed sleep, so nothing is raised on timeout, the state is asserted by the caller.
+
+    Args:
+        plc: The PLC client instance.
+        expected_outputs: DigitalOutputs enum member -> expected value.
+        timeout: Maximum time to wait [s].
+
+    Returns:
+        True if all outputs reached the expected values within the timeout.
+    """
+    if plc.latest_values is not None:
+        # Outputs are already watched by the client, they are notified instead of polled
+        return await plc.wait_for_object_values(
+            {output.value: value for output, value in expected_outputs.items()}, timeout)
+    results = await asyncio.gather(
+        *(poll_until_expected_output(plc, output, value, timeout) for output, value in expected_outputs.items()),
+        return_exceptions=True,
+    )
+    return not any(isinstance(result, TimeoutError) for result in results)
+
+
+async def await_condition(predicate, timeout=DEFAULT_TIMEOUT, poll=0.01) -> bool:
+    """
+    Wait until the predicate is met, at most timeout [s]. Used instead of a fixed sleep after
+    a stimulus, so nothing is raised on timeout, the state is asserted by the tests.
+
+    Args:
+        predicate: Coroutine function returning True once the condition is met.
+        timeout: Maximum time to wait [s].
+        poll: Time between two checks of the predicate [s].
+
+    Returns:
+        True if the condition was met within the timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not await predicate():
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(poll)
+    return True
+
+
+def passing(assertion, *args, **kwargs):
+    """
+    Predicate variant of an assertion helper, for await_condition.
+    The predicate returns True once the assertion passes.
+    """
+    async def predicate():
+        try:
+            await assertion(*args, **kwargs)
+        except AssertionError:
+            return False
+        return True
+    return predicate
+
+
+async def reset_and_expect(plc: PLCClient, alarm: str, expected: bool, timeout=DEFAULT_TIMEOUT):
+    """
+    Press RST and assert the Status of the alarm afterwards. A reset that should clear the alarm
+    is waited for (at most timeout [s]), an alarm that should stay active is checked after
+    STABILITY_WINDOW. RST is pulsed with set_object_pulse, held high for PULSE_TIME, longer
+    than the PLC cycle it needs to see the rising edge.
+    """
+    await plc.set_object_pulse(_RST)
+    if expected:
+        await asyncio.sleep(STABILITY_WINDOW)
+    else:
+        await await_alarm_statuses(plc, {alarm: False}, timeout)
+    await assert_alarm_status(plc, alarm, expected)
 
 
 async def move_plc_to_desired_step(plc: PLCClient, step: Steps):
@@ -226,40 +448,36 @@ async def move_plc_to_desired_step(plc: PLCClient, step: Steps):
     This is not an exhaustive test for state transitions, this is tested in test_aa_grafcet.py.
     """
     # STOP
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, False)
-    await plc.set_object_value(DigitalInputs.L_LVL_SENSOR.value, False)
-    await plc.set_object_value(DigitalInputs.H_LVL_SENSOR.value, False)
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, False)
+    await plc.set_object_values([_LL, _L, _H, _HH], [False, False, False, False])
     if step == Steps.STOP:
         return
 
     # PREFILLING
-    await plc.set_object_pulse(DigitalInputs.START_BUTTON.value)
+    await plc.set_object_pulse(_START)
     await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, True)
     if step == Steps.PREFILLING:
         return
 
     # INITIALISED
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, True)
-    await plc.set_object_value(DigitalInputs.L_LVL_SENSOR.value, True)
+    await plc.set_object_values([_LL, _L], [True, True])
     await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, False)
     if step == Steps.INITIALISED:
         return
 
     # FILLING
-    await plc.set_object_pulse(DigitalInputs.RUN_BUTTON.value)
+    await plc.set_object_pulse(_RUN)
     await wait_until_expected_output(plc, DigitalOutputs.FILLING_VALVE_OPEN, True)
     if step == Steps.FILLING:
         return
 
     # HEATING
-    await plc.set_object_value(DigitalInputs.H_LVL_SENSOR.value, True)
+    await plc.set_object_value(_H, True)
     await wait_until_expected_output(plc, DigitalOutputs.HEATING_ON, True)
     if step == Steps.HEATING:
         return
 
     # DISCHARGING_VALVE
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 46.0)
+    await plc.set_object_value(_TEMP, 46.0)
     await wait_until_expected_output(plc, DigitalOutputs.DISCHARGING_VALVE_OPEN, True)
     if step == Steps.DISCHARGING_VALVE:
         return
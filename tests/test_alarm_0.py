@@ -1,36 +1,27 @@
 import asyncio
 import pytest
-import pytest_asyncio
 
 from src.plc_client import PLCClient
-from src.plc_io_definitions import  AnalogInputs, DigitalInputs, DigitalOutputs
-from src.plc_utils import Alarms, Steps
+from src.plc_io_definitions import DigitalInputs
+from src.plc_utils import Alarms
 
 from tests.helpers_test import (
     assert_all_alarms_off,
     DEFAULT_TIMEOUT,
+    STABILITY_WINDOW,
+    ALARM_STEPS,
+    await_condition,
+    passing,
+    await_alarm_statuses,
+    reset_and_expect,
     move_plc_to_desired_step,
     press_buttons_at_once,
-    reset_plc_to_clean_stop_state,
     assert_proper_alarm_a0_reaction,
 )
 
-SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
-CLIENT_TIMEOUT = 5  # seconds
-
-@pytest_asyncio.fixture()
-async def plc() -> PLCClient:
-    plc = PLCClient(url=SERVER_URL, timeout=CLIENT_TIMEOUT)
-    await plc.init()
-
-    # Start every test from the STOP state with innitial values and no alarms.
-    await reset_plc_to_clean_stop_state(plc)
-
-    # Yield fixture
-    yield plc
-
-    # Disconnect
-    await plc.disconnect()
+# Names of the PLC objects, looked up once at import
+TANK_TOO_HIGH = Alarms.TANK_TOO_HIGH.value
+HH_LVL_SENSOR = DigitalInputs.HH_LVL_SENSOR.value
 
 async def simulate_and_validate_a0(plc: PLCClient):
     """
@@ -44,47 +35,36 @@ async def simulate_and_validate_a0(plc: PLCClient):
     6. Reset again (should succeed)
     """
     # 1. Simulate water level too high
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(HH_LVL_SENSOR, True)
+    await await_alarm_statuses(plc, {TANK_TOO_HIGH: True})
+    # Status is published before the outputs of the error step, in the same PLC cycle
+    await await_condition(passing(assert_proper_alarm_a0_reaction, plc))
 
     # 2. Assert correct system response
     await assert_proper_alarm_a0_reaction(plc)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value) == True
+    assert await plc.get_alarm_status(TANK_TOO_HIGH) is True
 
     # 3. Inputs should be ignored
     await press_buttons_at_once(plc)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await asyncio.sleep(STABILITY_WINDOW)
     await assert_proper_alarm_a0_reaction(plc)
 
     # 4. Reset the alarm (should fail, sensor still high)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await reset_and_expect(plc, TANK_TOO_HIGH, True)
     await assert_proper_alarm_a0_reaction(plc)
 
     # 5. Lower the sensor signal
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, False)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(HH_LVL_SENSOR, False)
+    await asyncio.sleep(DEFAULT_TIMEOUT) # Nothing should change, the PLC still needs a cycle to read the sensor
 
     # Alarm still active until reset
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value) == True
+    assert await plc.get_alarm_status(TANK_TOO_HIGH) is True
 
     # 6. Reset alarm (should now clear)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value) == False
+    await reset_and_expect(plc, TANK_TOO_HIGH, False)
     await assert_all_alarms_off(plc)
 
-@pytest.mark.asyncio
-@pytest.mark.parametrize(
-    "step", [
-        Steps.STOP,
-        Steps.PREFILLING,
-        Steps.INITIALISED,
-        Steps.FILLING,
-        Steps.HEATING,
-        Steps.DISCHARGING_VALVE
-    ]
-)
+@pytest.mark.parametrize("step", ALARM_STEPS)
 async def test_a0_from_selected_states(plc, step):
     """
     Test A0 triggered across all operational states
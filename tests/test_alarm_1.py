@@ -1,30 +1,26 @@
 import asyncio
 import pytest
-import pytest_asyncio
 
 from src.plc_client import PLCClient
-from src.plc_io_definitions import  AnalogInputs, DigitalInputs, DigitalOutputs
+from src.plc_io_definitions import DigitalInputs
 from src.plc_utils import Alarms, Steps
 
 from tests.helpers_test import (
     assert_all_alarms_off,
     DEFAULT_TIMEOUT,
+    STABILITY_WINDOW,
+    await_condition,
+    passing,
+    await_alarm_statuses,
+    reset_and_expect,
     move_plc_to_desired_step,
     press_buttons_at_once,
-    reset_plc_to_clean_stop_state,
     assert_proper_alarm_a1_reaction,
 )
 
-SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
-CLIENT_TIMEOUT = 5  # seconds
-
-@pytest_asyncio.fixture()
-async def plc() -> PLCClient:
-    plc = PLCClient(url=SERVER_URL, timeout=CLIENT_TIMEOUT)
-    await plc.init()
-    await reset_plc_to_clean_stop_state(plc)
-    yield plc
-    await plc.disconnect()
+# Names of the PLC objects, looked up once at import
+TANK_TOO_LOW = Alarms.TANK_TOO_LOW.value
+LL_LVL_SENSOR = DigitalInputs.LL_LVL_SENSOR.value
 
 async def simulate_and_validate_a1(plc: PLCClient):
     """
@@ -36,25 +32,24 @@ async def simulate_and_validate_a1(plc: PLCClient):
     4. Reset should clear the alarm even if sensor is still False.
     """
     # 1. Simulate water level too low
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, False) # No reading for low-low level sensor
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(LL_LVL_SENSOR, False) # No reading for low-low level sensor
+    await await_alarm_statuses(plc, {TANK_TOO_LOW: True})
+    # Status is published before the outputs of the error step, in the same PLC cycle
+    await await_condition(passing(assert_proper_alarm_a1_reaction, plc))
 
     # 2. Assert actuations after overfilling condition, specific alarm is also triggered
     await assert_proper_alarm_a1_reaction(plc)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value) == True
+    assert await plc.get_alarm_status(TANK_TOO_LOW) is True
 
     # 3. Try to press start, run, stop - should be no reaction
     await press_buttons_at_once(plc)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await assert_proper_alarm_a1_reaction(plc) == True
+    await asyncio.sleep(STABILITY_WINDOW)
+    await assert_proper_alarm_a1_reaction(plc)
 
     # 4. Reset the alarm, alarm should be turned off now
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value) == False
+    await reset_and_expect(plc, TANK_TOO_LOW, False)
     await assert_all_alarms_off(plc) # Just make sure that all other alarms are off
 
-@pytest.mark.asyncio
 async def test_a1_while_stop(plc: PLCClient):
     """
     A1 triggered when the system is stopped.
@@ -63,22 +58,20 @@ async def test_a1_while_stop(plc: PLCClient):
     value to True manually in this case
     """
     await move_plc_to_desired_step(plc, Steps.STOP)
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(LL_LVL_SENSOR, True)
+    await asyncio.sleep(DEFAULT_TIMEOUT) # The PLC has to read the sensor before its falling edge, no output changes
     await simulate_and_validate_a1(plc)
 
-@pytest.mark.asyncio
 async def test_a1_while_prefilling(plc: PLCClient):
     """
     A1 triggered during pre-filling.
     Same as in the STOP state, LL sensor value has to be set to True manually.
     """
     await move_plc_to_desired_step(plc, Steps.PREFILLING)
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(LL_LVL_SENSOR, True)
+    await asyncio.sleep(DEFAULT_TIMEOUT) # The PLC has to read the sensor before its falling edge, no output changes
     await simulate_and_validate_a1(plc)
 
-@pytest.mark.asyncio
 @pytest.mark.parametrize(
     "step", [
         Steps.INITIALISED,
@@ -1,30 +1,26 @@
 import asyncio
 import pytest
-import pytest_asyncio
 
 from src.plc_client import PLCClient
-from src.plc_io_definitions import DigitalInputs, DigitalOutputs
-from src.plc_utils import Alarms, Steps
+from src.plc_io_definitions import DigitalInputs
+from src.plc_utils import Alarms
 
 from tests.helpers_test import (
     assert_all_alarms_off,
-    DEFAULT_TIMEOUT,
+    STABILITY_WINDOW,
+    ALARM_STEPS,
+    await_condition,
+    passing,
+    await_alarm_statuses,
+    reset_and_expect,
     move_plc_to_desired_step,
     press_buttons_at_once,
-    reset_plc_to_clean_stop_state,
     assert_proper_alarm_a5_reaction,
 )
 
-SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
-CLIENT_TIMEOUT = 5  # seconds
-
-@pytest_asyncio.fixture()
-async def plc() -> PLCClient:
-    plc = PLCClient(url=SERVER_URL, timeout=CLIENT_TIMEOUT)
-    await plc.init()
-    await reset_plc_to_clean_stop_state(plc)
-    yield plc
-    await plc.disconnect()
+# Names of the PLC objects, looked up once at import
+ES_BUTTON = DigitalInputs.ES_BUTTON.value
+ES_PRESSED = Alarms.ES_PRESSED.value
 
 async def simulate_and_validate_a5(plc: PLCClient):
     """
@@ -36,39 +32,26 @@ async def simulate_and_validate_a5(plc: PLCClient):
     5. Release button
     6. Reset clears alarm
     """
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(ES_BUTTON, True)
+    await await_alarm_statuses(plc, {ES_PRESSED: True})
+    # Status is published before the outputs of the error step, in the same PLC cycle
+    await await_condition(passing(assert_proper_alarm_a5_reaction, plc))
 
     await assert_proper_alarm_a5_reaction(plc)
-    assert await plc.get_alarm_status(Alarms.ES_PRESSED.value) == True
+    assert await plc.get_alarm_status(ES_PRESSED) is True
 
     await press_buttons_at_once(plc)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await asyncio.sleep(STABILITY_WINDOW)
     await assert_proper_alarm_a5_reaction(plc)
 
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.ES_PRESSED.value) == True
+    await reset_and_expect(plc, ES_PRESSED, True)
 
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, False)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(ES_BUTTON, False)
 
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.ES_PRESSED.value) == False
+    await reset_and_expect(plc, ES_PRESSED, False) # Spans several PLC cycles, the cleared input is read before it ends
     await assert_all_alarms_off(plc)
 
-@pytest.mark.asyncio
-@pytest.mark.parametrize(
-    "step", [
-        Steps.STOP,
-        Steps.PREFILLING,
-        Steps.INITIALISED,
-        Steps.FILLING,
-        Steps.HEATING,
-        Steps.DISCHARGING_VALVE
-    ]
-)
+@pytest.mark.parametrize("step", ALARM_STEPS)
 async def test_a5_from_selected_states(plc, step):
     """
     Test A5 (Emergency Stop) triggered from all operational states.
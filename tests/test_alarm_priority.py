@@ -1,14 +1,14 @@
-import asyncio
 import pytest
-import pytest_asyncio
 
 from src.plc_client import PLCClient
-from src.plc_io_definitions import AnalogInputs, DigitalInputs, DigitalOutputs
+from src.plc_io_definitions import AnalogInputs, DigitalInputs
 from src.plc_utils import Alarms, Steps
 from tests.helpers_test import (
-    DEFAULT_TIMEOUT,
+    await_condition,
+    passing,
+    await_alarm_statuses,
+    reset_and_expect,
     move_plc_to_desired_step,
-    reset_plc_to_clean_stop_state,
     assert_proper_alarm_a0_reaction,
     assert_proper_alarm_a1_reaction,
     assert_proper_alarm_a2_reaction,
@@ -16,192 +16,153 @@ from tests.helpers_test import (
     assert_proper_alarm_a4_reaction,
     assert_proper_alarm_a5_reaction,
     assert_all_alarms_off,
+    await_all_alarms_off,
 )
 
-SERVER_URL = "opc.tcp://localhost:7000/freeopcua/server/"
-CLIENT_TIMEOUT = 5  # seconds
-
-@pytest_asyncio.fixture()
-async def plc() -> PLCClient:
-    plc = PLCClient(url=SERVER_URL, timeout=CLIENT_TIMEOUT)
-    await plc.init()
-    await reset_plc_to_clean_stop_state(plc)
-    yield plc
-    await plc.disconnect()
-
-@pytest.mark.asyncio
-async def test_alarm_priority_enforcement_low_to_high_priority(plc: PLCClient):
+# Names of the PLC objects, looked up once at import
+DISCHARGING_GATE_CLOSED = DigitalInputs.DISCHARGING_GATE_CLOSED.value
+DOOR_OPEN = Alarms.DOOR_OPEN.value
+TEMPERATURE_SENSOR = AnalogInputs.TEMPERATURE_SENSOR.value
+TEMP_TOO_LOW = Alarms.TEMP_TOO_LOW.value
+LL_LVL_SENSOR = DigitalInputs.LL_LVL_SENSOR.value
+TANK_TOO_LOW = Alarms.TANK_TOO_LOW.value
+TEMP_TOO_HIGH = Alarms.TEMP_TOO_HIGH.value
+HH_LVL_SENSOR = DigitalInputs.HH_LVL_SENSOR.value
+TANK_TOO_HIGH = Alarms.TANK_TOO_HIGH.value
+ES_BUTTON = DigitalInputs.ES_BUTTON.value
+ES_PRESSED = Alarms.ES_PRESSED.value
+RST_BUTTON = DigitalInputs.RST_BUTTON.value
+
+# Every alarm with the input raising it, (input, value, alarm)
+TRIGGER_A0 = (HH_LVL_SENSOR, True, TANK_TOO_HIGH)
+TRIGGER_A1 = (LL_LVL_SENSOR, False, TANK_TOO_LOW)
+TRIGGER_A2 = (TEMPERATURE_SENSOR, 99.0, TEMP_TOO_HIGH)
+TRIGGER_A3 = (TEMPERATURE_SENSOR, 5.0, TEMP_TOO_LOW)
+TRIGGER_A4 = (DISCHARGING_GATE_CLOSED, False, DOOR_OPEN)
+TRIGGER_A5 = (ES_BUTTON, True, ES_PRESSED)
+
+
+async def clear_alarms_one_by_one(plc: PLCClient):
     """
-    When multiple alarms are active, the one with highest priority should dominate.
-    Full priority order (from highest to lowest priority):
-        1. Emergency Stop (A5)
-        2. Tank Too High (A0)
-        3. Temp Too High (A2)
-        4. Tank Too Low (A1)
-        5. Temp Too Low (A3)
-        6. Door Open (A4)
-
-    This test triggers all alarms from the lowest to the highest priority and checks if the
-    expected alarm is active. It also checks if the alarms are cleared in the correct order.
-
-    NOTE: Since PLC does not publish the current step, the best way to check if the
-    behavior is correct is to check if the values are as expected when the certain alarm
-    was triggered. Not the dream solution, but the best I can do now.
+    One by one clearing of alarms to check fallback priority handling. The RST pulse spans
+    several PLC cycles, so the cleared input is read before it ends.
+    Expects the temperature left at the A2 trigger value (alarms raised from low to high priority).
     """
-    # Move to a known running state
-    await move_plc_to_desired_step(plc, Steps.FILLING)
-
-    # Activate all alarms in reverse priority (lowest to highest), every alarm should be
-    # triggered when the condition is met.
-    await plc.set_object_value(DigitalInputs.DISCHARGING_GATE_CLOSED.value, False)  # A4
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.DOOR_OPEN.value)
-
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 5.0)          # A3
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_LOW.value)
-
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, False)            # A1
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value)
-
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 99.0)         # A2
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_HIGH.value)
-
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, True)             # A0
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value)
-
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, True)                 # A5 (top priority)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.ES_PRESSED.value)
-
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-
-    # All alarms should be still active
-    assert await plc.get_alarm_status(Alarms.DOOR_OPEN.value)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_LOW.value)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_HIGH.value)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value)   
-
-    # A5 should dominate, since step is not explicitily available from the outside validate if
-    # behavior is correct by checking the values expected when ES was triggered.
-    await assert_proper_alarm_a5_reaction(plc)
-
-    # One by one clearing of alarms to check fallback priority handling
-
     # Clear Emergency Stop (A5), expect A0 to take over
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, False)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(ES_BUTTON, False)
+    await reset_and_expect(plc, ES_PRESSED, False)
+    await await_condition(passing(assert_proper_alarm_a0_reaction, plc))
     await assert_proper_alarm_a0_reaction(plc)
 
     # Clear A0 -> expect A2 to take over
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, False)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(HH_LVL_SENSOR, False)
+    await reset_and_expect(plc, TANK_TOO_HIGH, False)
+    await await_condition(passing(assert_proper_alarm_a2_reaction, plc))
     await assert_proper_alarm_a2_reaction(plc)
 
     # Clear A2 -> expect A1
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 40.0)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(TEMPERATURE_SENSOR, 40.0)
+    await reset_and_expect(plc, TEMP_TOO_HIGH, False)
+    await await_condition(passing(assert_proper_alarm_a1_reaction, plc))
     await assert_proper_alarm_a1_reaction(plc)
 
     # Clear A1 -> expect A3
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, True)
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 5.0) # This has to be manually set as it was cleared with A2 clearing
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    # Temperature has to be manually set as it was cleared with A2 clearing
+    await plc.set_object_values([LL_LVL_SENSOR, TEMPERATURE_SENSOR], [True, 5.0])
+    await reset_and_expect(plc, TANK_TOO_LOW, False)
+    await await_condition(passing(assert_proper_alarm_a3_reaction, plc))
     await assert_proper_alarm_a3_reaction(plc)
 
     # Clear A3 -> expect A4
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 20.0)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await plc.set_object_value(TEMPERATURE_SENSOR, 20.0)
+    await reset_and_expect(plc, TEMP_TOO_LOW, False)
+    await await_condition(passing(assert_proper_alarm_a4_reaction, plc))
     await assert_proper_alarm_a4_reaction(plc)
 
     # Clear A4
-    await plc.set_object_value(DigitalInputs.DISCHARGING_GATE_CLOSED.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-
-    # All alarms be cleared
-    await assert_all_alarms_off(plc)
+    await plc.set_object_value(DISCHARGING_GATE_CLOSED, True)
+    await reset_and_expect(plc, DOOR_OPEN, False)
 
 
-@pytest.mark.asyncio
-async def test_alarm_priority_enforcement_high_to_low_priority(plc: PLCClient):
+async def clear_emergency_then_all(plc: PLCClient):
     """
-    Same as the previous test, but this time alarms are triggered in the order of
-    highest to lowest priority.
+    Reset is rejected while A5 is active, once ES is released A0 takes over.
+    Then every input is cleared and a single reset clears all alarms.
     """
-    await move_plc_to_desired_step(plc, Steps.FILLING)
-
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, True) # A5
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.ES_PRESSED.value)
+    # Reset has no effect while A5 is active
+    await reset_and_expect(plc, ES_PRESSED, True)
     await assert_proper_alarm_a5_reaction(plc)
 
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, True) # A0
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value)
+    # Clear A5
+    await plc.set_object_value(ES_BUTTON, False)
+    await reset_and_expect(plc, ES_PRESSED, False)
+    await await_condition(passing(assert_proper_alarm_a0_reaction, plc))
 
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 99.0) # A2
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_HIGH.value)
+    # A0 should now dominate
+    await assert_proper_alarm_a0_reaction(plc)
 
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, False) # A1
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value)
+    # Clean all
+    await plc.set_object_values(
+        [HH_LVL_SENSOR, TEMPERATURE_SENSOR,
+         LL_LVL_SENSOR, DISCHARGING_GATE_CLOSED],
+        [False, 20.0, True, True],
+    )
+    await plc.set_object_pulse(RST_BUTTON)
+    await await_all_alarms_off(plc)
+
+
+@pytest.mark.parametrize(
+    "triggers, clear_alarms", [
+        pytest.param([TRIGGER_A4, TRIGGER_A3, TRIGGER_A1, TRIGGER_A2, TRIGGER_A0, TRIGGER_A5],
+                     clear_alarms_one_by_one, id="low_to_high"),
+        pytest.param([TRIGGER_A5, TRIGGER_A0, TRIGGER_A2, TRIGGER_A1, TRIGGER_A3, TRIGGER_A4],
+                     clear_emergency_then_all, id="high_to_low"),
+    ]
+)
+async def test_alarm_priority_enforcement(plc: PLCClient, triggers, clear_alarms):
+    """
+    When multiple alarms are active, the one with highest priority should dominate.
+    Full priority order (from highest to lowest priority):
+        1. Emergency Stop (A5)
+        2. Tank Too High (A0)
+        3. Temp Too High (A2)
+        4. Tank Too Low (A1)
+        5. Temp Too Low (A3)
+        6. Door Open (A4)
 
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 5.0) # A3
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_LOW.value)
+    This test triggers all alarms in the given order (lowest to highest priority and the
+    other way round), checks that every alarm stays active and that A5 dominates after every
+    trigger from ES on. Then the alarms are cleared, checking which alarm takes over.
 
-    await plc.set_object_value(DigitalInputs.DISCHARGING_GATE_CLOSED.value, False) # A4
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    assert await plc.get_alarm_status(Alarms.DOOR_OPEN.value)
+    NOTE: Since PLC does not publish the current step, the best way to check if the
+    behavior is correct is to check if the values are as expected when the certain alarm
+    was triggered. Not the dream solution, but the best I can do now.
+    """
+    # Move to a known running state
+    await move_plc_to_desired_step(plc, Steps.FILLING)
 
-    # All alarms should be active
-    assert await plc.get_alarm_status(Alarms.DOOR_OPEN.value)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_LOW.value)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_LOW.value)
-    assert await plc.get_alarm_status(Alarms.TEMP_TOO_HIGH.value)
-    assert await plc.get_alarm_status(Alarms.TANK_TOO_HIGH.value)   
+    # Activate all alarms, every alarm should be triggered when the condition is met.
+    # Once ES is pressed, A5 has to keep dominating after every further trigger.
+    es_pressed = False
+    for name, value, alarm in triggers:
+        await plc.set_object_value(name, value)
+        await await_alarm_statuses(plc, {alarm: True})
+        assert await plc.get_alarm_status(alarm)
+        es_pressed = es_pressed or alarm == ES_PRESSED
+        if es_pressed:
+            # Status is published before the outputs of the error step, in the same PLC cycle
+            await await_condition(passing(assert_proper_alarm_a5_reaction, plc))
+            await assert_proper_alarm_a5_reaction(plc)
 
-    # A5 should dominate
-    await assert_proper_alarm_a5_reaction(plc)
+    # All alarms should be still active
+    for _, _, alarm in triggers:
+        assert await plc.get_alarm_status(alarm)
 
-    # Reset has no effect while A5 is active
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    # A5 should dominate, since step is not explicitily available from the outside validate if
+    # behavior is correct by checking the values expected when ES was triggered.
     await assert_proper_alarm_a5_reaction(plc)
 
-    # Clear A5
-    await plc.set_object_value(DigitalInputs.ES_BUTTON.value, False)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-
-    # A0 should now dominate
-    await assert_proper_alarm_a0_reaction(plc)
-
-    # Clean all
-    await plc.set_object_value(DigitalInputs.HH_LVL_SENSOR.value, False)
-    await plc.set_object_value(AnalogInputs.TEMPERATURE_SENSOR.value, 20.0)
-    await plc.set_object_value(DigitalInputs.LL_LVL_SENSOR.value, True)
-    await plc.set_object_value(DigitalInputs.DISCHARGING_GATE_CLOSED.value, True)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
-    await plc.set_object_pulse(DigitalInputs.RST_BUTTON.value)
-    await asyncio.sleep(DEFAULT_TIMEOUT)
+    await clear_alarms(plc)
 
+    # All alarms be cleared
     await assert_all_alarms_off(plc)